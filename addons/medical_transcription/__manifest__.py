@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Medical Transcription',
-    'version': '16.0.1.0.0',
+    'version': '16.0.1.1.0',
     'category': 'Healthcare',
     'summary': 'Medical audio transcription with Flask API integration',
     'description': """
@@ -21,14 +21,17 @@ Docker Configuration:
     """,
     'author': 'LIKSOFT',
     'website': 'https://yourwebsite.com',
-    'depends': ['base', 'web'],
+    'depends': ['base', 'web', 'bus'],
     'data': [
         'security/security.xml',
         'security/ir.model.access.csv',
         'data/ir_sequence_data.xml',
+        'data/ir_cron_data.xml',
         'report/transcription_report.xml',
         'views/res_config_settings_views.xml',
         'views/menu_views.xml',
+        'views/medical_transcription_job_views.xml',
+        'views/medical_transcription_stats_views.xml',
     ],
     'assets': {
         'web.assets_backend': [
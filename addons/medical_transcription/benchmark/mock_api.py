@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the Flask transcription API, for benchmarks and load tests.
+
+Implements the ``/api/medical/*`` endpoints used by the addon with a
+configurable latency, payload size and failure rate. Standard library only.
+
+Usage::
+
+    python3 mock_api.py --port 5001 --latency 2 --jitter 0.5 --failure-rate 0.02
+
+then point ``medical_transcription.api_url`` to it.
+"""
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_logger = logging.getLogger('mock_api')
+
+WORDS = ('patient', 'douleur', 'thoracique', 'depuis', 'trois', 'jours', 'sans', 'fievre',
+         'antecedents', 'tension', 'normale', 'examen', 'clinique', 'rassurant', 'traitement')
+
+TEMPLATES = [{
+    'type': 'consultation',
+    'display_name': 'Consultation generale',
+    'description': 'Benchmark template',
+    'fields': [
+        {'key': 'nom', 'label': 'Nom', 'required': True},
+        {'key': 'age', 'label': 'Age', 'required': False},
+        {'key': 'motif_de_consultation', 'label': 'Motif de consultation', 'required': True},
+        {'key': 'examen_clinique', 'label': 'Examen clinique', 'required': False},
+        {'key': 'conclusion', 'label': 'Conclusion', 'required': False},
+    ],
+}]
+
+
+class MockState:
+    """Settings and in-memory transcriptions shared by the request threads"""
+
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.Lock()
+        self.transcriptions = {}
+        self.counters = {}
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+
+def lorem(size):
+    """Pseudo medical text of about ``size`` characters"""
+    words = []
+    length = 0
+    while length < size:
+        word = random.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def fake_pdf(size):
+    body = b'%PDF-1.4\n%mock\n'
+    return body + b'0' * max(0, size - len(body) - 6) + b'\n%%EOF'
+
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockTranscriptionAPI/1.0'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        _logger.debug(format, *args)
+
+    # Helpers
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_body(status, body, 'application/json', headers)
+
+    def simulate(self, endpoint, latency=None):
+        """Sleep like the real API and maybe fail; returns False if it failed"""
+        options = self.state.options
+        self.state.count(endpoint)
+        delay = options.latency if latency is None else latency
+        if delay:
+            time.sleep(max(0.0, random.gauss(delay, options.jitter)))
+        if random.random() < options.failure_rate:
+            self.state.count('failures')
+            self.send_json({'success': False, 'error': 'Simulated failure'}, status=options.failure_status)
+            return False
+        return True
+
+    def parse_form(self, body):
+        """Parse a multipart body into ``(fields, file sizes)``"""
+        content_type = self.headers.get('Content-Type', '')
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + body)
+        form, files = {}, {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename():
+                files[name] = len(part.get_payload(decode=True) or b'')
+            else:
+                form[name] = part.get_content()
+        return form, files
+
+    def etag_response(self, payload):
+        """Answer with an ETag, or 304 if the client already has it"""
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_body(200, body, 'application/json', {'ETag': etag})
+
+    # Routing
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/api/medical/templates':
+            if self.simulate('templates', latency=self.state.options.fast_latency):
+                self.etag_response({'success': True, 'templates': TEMPLATES})
+        elif path.startswith('/api/medical/transcription/'):
+            self.get_transcription(path.rsplit('/', 1)[-1])
+        elif path.startswith('/api/medical/files/'):
+            self.get_file(path.rsplit('/', 1)[-1])
+        elif path == '/health':
+            self.send_json({'success': True, 'counters': self.state.counters})
+        else:
+            self.send_json({'success': False, 'error': 'Not found'}, status=404)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        body = self.read_body()
+        if path == '/api/medical/transcribe':
+            self.transcribe(body)
+        elif path == '/api/medical/extract':
+            self.extract(body)
+        elif path == '/api/medical/validate':
+            self.validate(body)
+        else:
+            self.send_json({'success': False, 'error': 'Not found'}, status=404)
+
+    # Endpoints
+
+    def extraction(self, fields):
+        options = self.state.options
+        keys = [field.get('key') if isinstance(field, dict) else field for field in fields]
+        return {key: lorem(options.field_size) for key in keys or ['motif_de_consultation']}
+
+    def store(self, result):
+        with self.state.lock:
+            self.state.transcriptions[result['transcription_id']] = result
+
+    def transcribe(self, body):
+        form, files = self.parse_form(body)
+        if not files.get('audio'):
+            self.send_json({'success': False, 'error': 'Missing audio'}, status=400)
+            return
+        # Latency grows with the audio size, like Whisper
+        options = self.state.options
+        latency = options.latency + files['audio'] / (1024 * 1024) * options.latency_per_mb
+        if not self.simulate('transcribe', latency=latency):
+            return
+        text = lorem(options.text_size)
+        if form.get('transcribe_only') == 'true':
+            self.send_json({'success': True, 'whisper_transcription': text})
+            return
+        fields = json.loads(form.get('fields') or '[]')
+        self.send_json(self.new_result(text, fields))
+
+    def extract(self, body):
+        if not self.simulate('extract'):
+            return
+        payload = json.loads(body or b'{}')
+        self.send_json(self.new_result(payload.get('text', ''), payload.get('fields', [])))
+
+    def new_result(self, text, fields):
+        transcription_id = uuid.uuid4().hex[:12]
+        result = {
+            'success': True,
+            'transcription_id': transcription_id,
+            'whisper_transcription': text,
+            'cleaned_text': text,
+            'medical_report': lorem(self.state.options.report_size),
+            'extracted_data': self.extraction(fields),
+            'files': {
+                'pdf': f'/api/medical/files/{transcription_id}.pdf',
+                'json': f'/api/medical/files/{transcription_id}.json',
+            },
+            'created_at': time.time(),
+        }
+        self.store(result)
+        return result
+
+    def validate(self, body):
+        if not self.simulate('validate', latency=self.state.options.fast_latency):
+            return
+        payload = json.loads(body or b'{}')
+        transcription_id = payload.get('transcription_id') or uuid.uuid4().hex[:12]
+        with self.state.lock:
+            stored = self.state.transcriptions.setdefault(transcription_id, {})
+            stored['validated_data'] = payload.get('validated_data')
+        self.send_json({
+            'success': True,
+            'transcription_id': transcription_id,
+            'files': {'validated_pdf': f'/api/medical/files/{transcription_id}_validated.pdf'},
+        })
+
+    def get_transcription(self, transcription_id):
+        if not self.simulate('lookup', latency=self.state.options.fast_latency):
+            return
+        with self.state.lock:
+            stored = self.state.transcriptions.get(transcription_id)
+        if stored is None and self.state.options.strict_lookup:
+            self.send_json({'success': False, 'error': 'Not found'}, status=404)
+            return
+        stored = stored or self.new_result(lorem(self.state.options.text_size), [])
+        self.etag_response({
+            'success': True,
+            'transcription_id': transcription_id,
+            'transcription_type': 'consultation',
+            'validated': bool(stored.get('validated_data')),
+            'validated_data': stored.get('validated_data') or {},
+            'whisper_transcription': stored.get('whisper_transcription'),
+            'cleaned_text': stored.get('cleaned_text'),
+            'medical_report': stored.get('medical_report'),
+            'patient_info': {},
+            'requested_fields': stored.get('extracted_data') or {},
+            'additional_fields': {},
+            'files': stored.get('files') or {},
+        })
+
+    def get_file(self, filename):
+        if not self.simulate('download', latency=self.state.options.fast_latency):
+            return
+        options = self.state.options
+        if filename.endswith('.pdf'):
+            self.send_body(200, fake_pdf(options.pdf_size), 'application/pdf')
+        else:
+            payload = {'extracted_data': self.extraction([]), 'padding': 'x' * options.json_size}
+            self.send_body(200, json.dumps(payload).encode(), 'application/json')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--latency', type=float, default=2.0,
+                        help='mean latency of transcribe/extract calls, in seconds')
+    parser.add_argument('--latency-per-mb', type=float, default=0.5,
+                        help='additional transcribe latency per MB of audio')
+    parser.add_argument('--fast-latency', type=float, default=0.05,
+                        help='mean latency of templates/lookup/validate/download calls')
+    parser.add_argument('--jitter', type=float, default=0.1,
+                        help='standard deviation of the latencies, in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='probability that a call fails (0-1)')
+    parser.add_argument('--failure-status', type=int, default=503)
+    parser.add_argument('--text-size', type=int, default=4000, help='transcription length (chars)')
+    parser.add_argument('--report-size', type=int, default=2000, help='medical report length (chars)')
+    parser.add_argument('--field-size', type=int, default=80, help='length of each extracted value')
+    parser.add_argument('--pdf-size', type=int, default=200 * 1024, help='generated PDF size (bytes)')
+    parser.add_argument('--json-size', type=int, default=20 * 1024, help='generated JSON size (bytes)')
+    parser.add_argument('--strict-lookup', action='store_true',
+                        help='answer 404 to lookups of unknown transcription IDs')
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if options.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    server = ThreadingHTTPServer((options.host, options.port), MockApiHandler)
+    server.daemon_threads = True
+    server.state = MockState(options)
+    _logger.info(f"Mock transcription API listening on http://{options.host}:{options.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        _logger.info(f"Calls served: {server.state.counters}")
+
+
+if __name__ == '__main__':
+    main()
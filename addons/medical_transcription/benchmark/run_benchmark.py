@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""Load test of the medical transcription routes of a running Odoo.
+
+Each scenario sends ``--requests`` calls with ``--concurrency`` parallel
+clients (one Odoo session each) and reports throughput, latency
+percentiles, errors and the RSS of the Odoo processes. Use it with
+``mock_api.py`` as the transcription API.
+
+Usage::
+
+    python3 run_benchmark.py --url http://localhost:8069 --db odoo \\
+        --login admin --password admin \\
+        --scenarios transcribe,validate,lookup,download,report \\
+        --requests 200 --concurrency 8
+
+The RSS is read from ``/proc``: run the driver on the Odoo host (or in its
+container) to get it, or pass ``--no-rss``.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import re
+import statistics
+import struct
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SCENARIOS = ('transcribe', 'validate', 'lookup', 'download', 'report')
+
+
+class OdooClient:
+    """Authenticated session of one benchmark client"""
+
+    def __init__(self, options):
+        self.url = options.url.rstrip('/')
+        self.timeout = options.timeout
+        self.session = requests.Session()
+        response = self.session.post(f'{self.url}/web/session/authenticate', json={
+            'jsonrpc': '2.0',
+            'params': {'db': options.db, 'login': options.login, 'password': options.password},
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        if response.json().get('error'):
+            raise RuntimeError(f"Authentication failed: {response.json()['error']}")
+        page = self.session.get(f'{self.url}/web', timeout=self.timeout).text
+        match = re.search(r'csrf_token:\s*"([^"]+)"', page)
+        self.csrf_token = match.group(1) if match else None
+
+    def rpc(self, route, **params):
+        response = self.session.post(f'{self.url}{route}', json={
+            'jsonrpc': '2.0', 'method': 'call', 'params': params,
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('error'):
+            raise RuntimeError(payload['error'].get('data', {}).get('message') or payload['error'])
+        return payload.get('result')
+
+    def call_kw(self, model, method, args, **kwargs):
+        return self.rpc(f'/web/dataset/call_kw/{model}/{method}',
+                        model=model, method=method, args=args, kwargs=kwargs)
+
+    def get(self, path):
+        """GET a file and read the whole body; returns its size"""
+        with self.session.get(f'{self.url}{path}', stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            return sum(len(chunk) for chunk in response.iter_content(64 * 1024))
+
+
+def make_wav(duration, rate=44100, channels=2):
+    """A stereo 44.1 kHz tone, like a browser recording"""
+    frames = io.BytesIO()
+    with wave.open(frames, 'wb') as audio:
+        audio.setnchannels(channels)
+        audio.setsampwidth(2)
+        audio.setframerate(rate)
+        period = [int(8000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(rate // 10)]
+        block = b''.join(struct.pack('<h', sample) * channels for sample in period)
+        for _i in range(int(duration * 10)):
+            audio.writeframes(block)
+    return frames.getvalue()
+
+
+class Benchmark:
+
+    def __init__(self, options):
+        self.options = options
+        self.local = threading.local()
+        self.audio = make_wav(options.audio_seconds)
+        self.template_fields = []
+
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = OdooClient(self.options)
+        return self.local.client
+
+    def audio_for(self, index):
+        """The generated audio, made unique per call unless --same-audio
+        (identical requests are answered from the result cache)"""
+        if self.options.same_audio:
+            return self.audio
+        # Overwrite the first samples after the 44 bytes WAV header
+        unique = struct.pack('<Qd', index, time.time())
+        return self.audio[:44] + unique + self.audio[44 + len(unique):]
+
+    # Scenarios: each performs one call and raises on failure
+
+    def transcribe(self, index):
+        client = self.client()
+        record_id = client.call_kw('medical.transcription', 'create', [{
+            'template_type': 'consultation',
+            'template_name': 'Consultation generale',
+            'audio_filename': 'benchmark.wav',
+            'state': 'transcribing',
+        }])
+        record_id = record_id[0] if isinstance(record_id, list) else record_id
+        response = client.session.post(
+            f'{client.url}/medical_transcription/upload/{record_id}',
+            params={'filename': 'benchmark.wav', 'csrf_token': client.csrf_token},
+            data=self.audio_for(index),
+            headers={'Content-Type': 'audio/wav'},
+            timeout=client.timeout,
+        )
+        response.raise_for_status()
+        queued = client.rpc('/medical_transcription/transcribe',
+                            transcription_id=record_id,
+                            audio_filename='benchmark.wav',
+                            template_type='consultation',
+                            template_fields=self.template_fields)
+        if not queued.get('success'):
+            raise RuntimeError(queued.get('error'))
+        deadline = time.monotonic() + self.options.job_timeout
+        while time.monotonic() < deadline:
+            status = client.rpc('/medical_transcription/job_status', job_id=queued['job_id'])
+            if status.get('state') == 'done':
+                return
+            if status.get('state') == 'failed' or not status.get('success'):
+                raise RuntimeError(status.get('error'))
+            time.sleep(self.options.poll_interval)
+        raise TimeoutError(f"Job {queued['job_id']} not done after {self.options.job_timeout}s")
+
+    def validate(self, index):
+        record = self.records['review'][index % len(self.records['review'])]
+        result = self.client().rpc(
+            '/medical_transcription/validate',
+            transcription_id=record['id'],
+            validated_data=json.loads(record['extracted_data_json'] or '{}'),
+            validated_report=record['medical_report'] or '',
+        )
+        if not result.get('success'):
+            raise RuntimeError(result.get('error'))
+
+    def lookup(self, index):
+        record = self.records['api'][index % len(self.records['api'])]
+        result = self.client().rpc('/medical_transcription/lookup',
+                                   api_transcription_id=record['api_transcription_id'])
+        if not result.get('success'):
+            raise RuntimeError(result.get('error'))
+
+    def download(self, index):
+        record = self.records['pdf'][index % len(self.records['pdf'])]
+        self.client().get(f"/medical_transcription/download/{record['id']}/pdf")
+
+    def report(self, index):
+        record = self.records['any'][index % len(self.records['any'])]
+        self.client().get(f"/medical_transcription/report/{record['id']}")
+
+    # Runner
+
+    def load_records(self):
+        """Pick the existing records used by the read/validate scenarios"""
+        client = self.client()
+        fields = ['id', 'state', 'api_transcription_id', 'extracted_data_json',
+                  'medical_report', 'pdf_filename']
+        records = client.call_kw('medical.transcription', 'search_read',
+                                 [[('state', 'in', ('review', 'validated'))]],
+                                 fields=fields, limit=self.options.sample_size, order='id desc')
+        self.records = {
+            'any': records,
+            'review': [record for record in records if record['state'] == 'review'],
+            'api': [record for record in records if record['api_transcription_id']],
+            'pdf': [record for record in records if record['pdf_filename']],
+        }
+        templates = client.rpc('/medical_transcription/templates')
+        for template in templates.get('templates') or []:
+            if template.get('type') == 'consultation':
+                self.template_fields = template.get('fields') or []
+
+    def run(self, scenario):
+        needs = {'validate': 'review', 'lookup': 'api', 'download': 'pdf', 'report': 'any'}
+        if scenario in needs:
+            self.load_records()
+            if not self.records[needs[scenario]]:
+                return {'scenario': scenario, 'skipped': f'no {needs[scenario]} records, run transcribe first'}
+        elif scenario == 'transcribe':
+            self.load_records()
+
+        action = getattr(self, scenario)
+        latencies, errors = [], []
+
+        def timed_call(index):
+            start = time.perf_counter()
+            try:
+                action(index)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(str(e))
+
+        rss_before = odoo_rss(self.options)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.options.concurrency) as executor:
+            list(executor.map(timed_call, range(self.options.requests)))
+        elapsed = time.perf_counter() - start
+        rss_after = odoo_rss(self.options)
+
+        return {
+            'scenario': scenario,
+            'requests': self.options.requests,
+            'concurrency': self.options.concurrency,
+            'ok': len(latencies),
+            'errors': len(errors),
+            'first_errors': sorted(set(errors))[:3],
+            'elapsed': elapsed,
+            'throughput': len(latencies) / elapsed if elapsed else 0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies) if latencies else None,
+            'mean': statistics.mean(latencies) if latencies else None,
+            'rss_before': rss_before,
+            'rss_after': rss_after,
+        }
+
+
+def percentile(values, rank):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(rank / 100 * len(values)) - 1))]
+
+
+def odoo_rss(options):
+    """RSS in bytes of the Odoo processes found in /proc: ``{pid: rss}``"""
+    if options.no_rss or not os.path.isdir('/proc'):
+        return {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    pattern = re.compile(options.process_pattern)
+    result = {}
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as cmdline:
+                command = cmdline.read().replace(b'\0', b' ').decode(errors='replace')
+            if int(pid) == os.getpid() or not pattern.search(command):
+                continue
+            with open(f'/proc/{pid}/statm') as statm:
+                result[int(pid)] = int(statm.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+    return result
+
+
+def format_rss(rss):
+    if not rss:
+        return 'n/a'
+    mb = 1024 * 1024
+    return f'{len(rss)} proc, total {sum(rss.values()) / mb:.0f} MB, max {max(rss.values()) / mb:.0f} MB'
+
+
+def print_report(results):
+    def ms(value):
+        return f'{value * 1000:9.0f}' if value is not None else '      n/a'
+
+    print(f"\n{'scenario':<12}{'ok':>6}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for result in results:
+        if 'skipped' in result:
+            print(f"{result['scenario']:<12} skipped: {result['skipped']}")
+            continue
+        print(f"{result['scenario']:<12}{result['ok']:>6}{result['errors']:>6}{result['throughput']:>9.2f}"
+              f"{ms(result['p50'])} {ms(result['p95'])} {ms(result['p99'])} {ms(result['max'])}")
+        for error in result['first_errors']:
+            print(f"{'':<12}error: {error[:100]}")
+        print(f"{'':<12}RSS before: {format_rss(result['rss_before'])}")
+        print(f"{'':<12}RSS after:  {format_rss(result['rss_after'])}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--login', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma separated, among {', '.join(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=100, help='calls per scenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='parallel clients')
+    parser.add_argument('--audio-seconds', type=float, default=60,
+                        help='duration of the generated WAV (stereo 44.1 kHz)')
+    parser.add_argument('--same-audio', action='store_true',
+                        help='send the same audio every time, to measure result cache hits')
+    parser.add_argument('--sample-size', type=int, default=500,
+                        help='existing records used by the read/validate scenarios')
+    parser.add_argument('--timeout', type=float, default=120, help='HTTP timeout, in seconds')
+    parser.add_argument('--job-timeout', type=float, default=600,
+                        help='maximum wait for a transcription job, in seconds')
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    parser.add_argument('--process-pattern', default=r'odoo|openerp-server',
+                        help='regex matched on the command line of the Odoo processes')
+    parser.add_argument('--no-rss', action='store_true')
+    parser.add_argument('--json', metavar='FILE', help='also write the results to FILE, as JSON')
+    options = parser.parse_args(argv)
+    options.scenarios = [name.strip() for name in options.scenarios.split(',') if name.strip()]
+    unknown = set(options.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    benchmark = Benchmark(options)
+    results = []
+    for scenario in options.scenarios:
+        print(f"Running {scenario}: {options.requests} calls, concurrency {options.concurrency}...",
+              file=sys.stderr)
+        results.append(benchmark.run(scenario))
+    print_report(results)
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump(results, output, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,52 +1,92 @@
 # -*- coding: utf-8 -*-
+import csv
+import io
 import json
 import base64
+import functools
+import hmac
 import logging
+import os
+import shutil
+import tempfile
+import time
 import traceback
+import zipfile
+
+from werkzeug.wsgi import wrap_file
 
 try:
     import requests
 except ImportError:
     requests = None
 
-from odoo import http
-from odoo.http import request
+from odoo import api, fields, http
+from odoo.exceptions import AccessError, MissingError, ValidationError
+from odoo.http import content_disposition, request
+
+from ..models import template_validator
+from ..models.transcription_api_cache import LOOKUP_KEY_PREFIX
 
 _logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+ZIP_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+# Entry of the reports ZIP listing the transcriptions without a PDF
+MISSING_REPORTS_NAME = 'Rapports_manquants.txt'
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def timed(stage):
+    """Record the duration of a route as ``route.<stage>``, per template when known"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                request.env['medical.transcription.timing']._record(
+                    f'route.{stage}',
+                    time.perf_counter() - start,
+                    template=kwargs.get('template_type'),
+                )
+        return wrapper
+    return decorator
+
 
 class TranscriptionController(http.Controller):
 
     def _get_api_url(self):
         """Get API base URL from system parameters"""
-        return request.env['ir.config_parameter'].sudo().get_param(
-            'medical_transcription.api_url',
-            default='http://host.docker.internal:5001'
-        )
+        return request.env['medical.transcription.api']._get_api_url()
 
     def _get_api_timeout(self):
         """Get API timeout from system parameters"""
-        return int(request.env['ir.config_parameter'].sudo().get_param(
-            'medical_transcription.api_timeout',
-            default='300'
-        ))
+        return request.env['medical.transcription.api']._get_api_timeout()
+
+    def _get_log_level(self):
+        """Level of the per-request logs (see the verbose logging setting)"""
+        return request.env['medical.transcription.api']._get_log_level()
 
     @http.route('/medical_transcription/templates', type='json', auth='user')
+    @timed('templates')
     def get_templates(self):
-        """Fetch available templates from Flask API"""
+        """Fetch available templates from Flask API, through the local cache"""
         try:
             if requests is None:
                 return {'success': False, 'error': 'requests library not installed'}
 
-            api_url = self._get_api_url()
-            _logger.info(f"Fetching templates from {api_url}/api/medical/templates")
-
-            response = requests.get(
-                f'{api_url}/api/medical/templates',
-                timeout=30
+            ttl = request.env['medical.transcription.api']._get_int_param(
+                'medical_transcription.templates_cache_ttl', 3600)
+            return request.env['medical.transcription.api.cache']._get_payload(
+                'templates',
+                '/api/medical/templates',
+                ttl
             )
-            response.raise_for_status()
-            return response.json()
         except requests.RequestException as e:
             _logger.error(f"Error fetching templates: {e}")
             return {'success': False, 'error': str(e)}
@@ -55,8 +95,15 @@ class TranscriptionController(http.Controller):
             return {'success': False, 'error': f"Unexpected error: {str(e)}"}
 
     @http.route('/medical_transcription/lookup', type='json', auth='user')
+    @timed('lookup')
     def lookup_transcription(self, api_transcription_id):
-        """Fetch full transcription details from Flask API by transcription ID"""
+        """Fetch full transcription details by transcription ID.
+
+        Transcriptions synced in Odoo are answered from the local record; other
+        IDs are fetched from the Flask API and kept in the local cache. With
+        several API backends, the backend of a local record with this ID is
+        asked first, otherwise each backend is tried until one knows the ID.
+        """
         try:
             if requests is None:
                 return {'success': False, 'error': 'requests library not installed'}
@@ -64,18 +111,37 @@ class TranscriptionController(http.Controller):
             if not api_transcription_id:
                 return {'success': False, 'error': 'Missing transcription ID'}
 
-            api_url = self._get_api_url()
-            _logger.info(f"Looking up transcription {api_transcription_id} from {api_url}")
-
-            response = requests.get(
-                f'{api_url}/api/medical/transcription/{api_transcription_id}',
-                timeout=30
-            )
-
-            if response.status_code == 404:
+            transcriptions = request.env['medical.transcription'].search([
+                ('api_transcription_id', '=', api_transcription_id),
+            ])
+            transcription = transcriptions.filtered(lambda t: t.state in ('review', 'validated'))[:1]
+            if transcription:
+                return transcription._get_lookup_payload()
+
+            api = request.env['medical.transcription.api']
+            backends = transcriptions.filtered('api_backend_url').mapped('api_backend_url')[:1] \
+                or api._get_api_urls()
+            ttl = api._get_int_param('medical_transcription.lookup_cache_ttl', 86400)
+            for api_url in backends:
+                _logger.log(self._get_log_level(), f"Looking up transcription {api_transcription_id} from {api_url}")
+                try:
+                    return request.env['medical.transcription.api.cache']._get_payload(
+                        f'{LOOKUP_KEY_PREFIX}{api_transcription_id}',
+                        f'/api/medical/transcription/{api_transcription_id}',
+                        ttl,
+                        api_url=api_url
+                    )
+                except requests.RequestException as e:
+                    # Unknown or unreachable here: the next backend may hold it
+                    retry = isinstance(e, requests.ConnectionError) or (
+                        e.response is not None and e.response.status_code == 404)
+                    if not retry or api_url == backends[-1]:
+                        raise
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
                 return {'success': False, 'error': f'Transcription "{api_transcription_id}" non trouvee sur l\'API.'}
-            response.raise_for_status()
-            return response.json()
+            _logger.error(f"Error looking up transcription: {e}")
+            return {'success': False, 'error': str(e)}
         except requests.ConnectionError:
             _logger.error(f"Cannot connect to API at {api_url}")
             return {'success': False, 'error': f'Impossible de se connecter a l\'API ({api_url}). Verifiez que le serveur Flask est en cours d\'execution.'}
@@ -86,9 +152,139 @@ class TranscriptionController(http.Controller):
             _logger.error(f"Unexpected error looking up transcription: {e}\n{traceback.format_exc()}")
             return {'success': False, 'error': f"Unexpected error: {str(e)}"}
 
+    @http.route(
+        '/medical_transcription/upload/<int:transcription_id>',
+        type='http',
+        auth='user',
+        methods=['POST']
+    )
+    @timed('upload')
+    def upload_audio(self, transcription_id, filename=None, **kwargs):
+        """Store the audio of a transcription from a raw or multipart body.
+
+        The body is spooled to a temporary file in chunks and copied into
+        the filestore, so memory stays bounded whatever the recording length.
+        """
+        transcription = request.env['medical.transcription'].browse(transcription_id)
+        if not transcription.exists():
+            return request.make_json_response(
+                {'success': False, 'error': f'Transcription {transcription_id} not found'}, status=404)
+        try:
+            # The audio is stored through sudo(): check the access explicitly
+            transcription.check_access_rights('write')
+            transcription.check_access_rule('write')
+        except AccessError as e:
+            return request.make_json_response({'success': False, 'error': str(e)}, status=403)
+
+        httprequest = request.httprequest
+        try:
+            upload = httprequest.files.get('audio')
+            if upload:
+                filename = filename or upload.filename
+                mimetype = upload.mimetype
+                spool = upload.stream
+            else:
+                mimetype = httprequest.mimetype
+                spool = tempfile.TemporaryFile()
+                shutil.copyfileobj(httprequest.stream, spool, UPLOAD_CHUNK_SIZE)
+
+            with spool:
+                size = transcription._store_binary_from_file('audio_file', spool, mimetype=mimetype or None)
+            if not size:
+                return request.make_json_response(
+                    {'success': False, 'error': 'Empty audio upload'}, status=400)
+
+            transcription.write({'audio_filename': filename or 'audio.wav'})
+            transcription._notify_progress('uploaded', size=size)
+            _logger.log(self._get_log_level(), f"Audio uploaded for transcription {transcription_id}: {size} bytes")
+            return request.make_json_response({'success': True, 'size': size})
+        except Exception as e:
+            _logger.error(f"Error uploading audio: {e}\n{traceback.format_exc()}")
+            return request.make_json_response(
+                {'success': False, 'error': f"Unexpected error: {str(e)}"}, status=500)
+
+    @http.route(
+        '/medical_transcription/upload/<int:transcription_id>/chunk',
+        type='http',
+        auth='user',
+        methods=['POST']
+    )
+    @timed('upload_chunk')
+    def upload_audio_chunk(self, transcription_id, index, **kwargs):
+        """Receive one chunk of a recording in progress (raw body).
+
+        Chunks are numbered from 0 and sent in order while recording; index
+        0 starts a new recording. They are joined by ``.../finalize``.
+        """
+        transcription = request.env['medical.transcription'].browse(transcription_id)
+        if not transcription.exists():
+            return request.make_json_response(
+                {'success': False, 'error': f'Transcription {transcription_id} not found'}, status=404)
+        try:
+            index = int(index)
+            if index < 0:
+                raise ValueError(index)
+        except ValueError:
+            return request.make_json_response(
+                {'success': False, 'error': f'Invalid chunk index: {index}'}, status=400)
+
+        try:
+            # Chunks are written outside the ORM: check the access explicitly
+            transcription.check_access_rights('write')
+            transcription.check_access_rule('write')
+        except AccessError as e:
+            return request.make_json_response({'success': False, 'error': str(e)}, status=403)
+
+        try:
+            size = transcription._store_audio_chunk(index, request.httprequest.stream)
+            return request.make_json_response({'success': True, 'index': index, 'size': size})
+        except Exception as e:
+            _logger.error(f"Error storing audio chunk {index} of {transcription_id}: {e}\n{traceback.format_exc()}")
+            return request.make_json_response(
+                {'success': False, 'error': f"Unexpected error: {str(e)}"}, status=500)
+
+    @http.route('/medical_transcription/upload/<int:transcription_id>/status', type='json', auth='user')
+    @timed('upload_status')
+    def upload_status(self, transcription_id):
+        """Return the index of the first missing chunk, to resume an upload"""
+        transcription = request.env['medical.transcription'].browse(transcription_id).exists()
+        if not transcription:
+            return {'success': False, 'error': f'Transcription {transcription_id} not found'}
+        return {'success': True, 'next_index': transcription._get_next_chunk_index()}
+
+    @http.route('/medical_transcription/upload/<int:transcription_id>/finalize', type='json', auth='user')
+    @timed('upload_finalize')
+    def upload_finalize(self, transcription_id, chunk_count, filename=None, mimetype=None):
+        """Join the uploaded chunks into the audio of the transcription"""
+        transcription = request.env['medical.transcription'].browse(transcription_id).exists()
+        if not transcription:
+            return {'success': False, 'error': f'Transcription {transcription_id} not found'}
+        try:
+            # The audio is stored through sudo(): check the access explicitly
+            transcription.check_access_rights('write')
+            transcription.check_access_rule('write')
+        except AccessError as e:
+            return {'success': False, 'error': str(e)}
+        try:
+            size = transcription._assemble_audio_chunks(int(chunk_count), mimetype=mimetype or None)
+            transcription.write({'audio_filename': filename or 'audio.wav'})
+            transcription._notify_progress('uploaded', size=size)
+            _logger.log(self._get_log_level(), f"Audio assembled for transcription {transcription_id}: {chunk_count} chunk(s), {size} bytes")
+            return {'success': True, 'size': size}
+        except ValidationError as e:
+            return {'success': False, 'error': str(e)}
+        except Exception as e:
+            _logger.error(f"Error assembling audio: {e}\n{traceback.format_exc()}")
+            return {'success': False, 'error': f"Unexpected error: {str(e)}"}
+
     @http.route('/medical_transcription/transcribe', type='json', auth='user')
+    @timed('transcribe')
     def transcribe(self, **kwargs):
-        """Send audio to Flask API for transcription"""
+        """Queue audio for transcription by the Flask API.
+
+        The API call runs in a background job; the returned ``job_id`` is
+        polled through ``/medical_transcription/job_status``.
+        """
         # Extract parameters from kwargs
         transcription_id = kwargs.get('transcription_id')
         audio_base64 = kwargs.get('audio_base64', '')
@@ -98,206 +294,240 @@ class TranscriptionController(http.Controller):
         input_language = kwargs.get('input_language', 'fr')
         output_language = kwargs.get('output_language', 'fr')
 
-        _logger.info(f"=== TRANSCRIBE START === id={transcription_id}, file={audio_filename}, type={template_type}")
-        _logger.info(f"Received kwargs keys: {list(kwargs.keys())}")
+        _logger.log(self._get_log_level(), f"=== TRANSCRIBE START === id={transcription_id}, file={audio_filename}, type={template_type}")
+        _logger.log(self._get_log_level(), f"Received kwargs keys: {list(kwargs.keys())}")
 
         try:
             if not transcription_id:
                 return {'success': False, 'error': 'Missing transcription_id'}
-            if not audio_base64:
-                return {'success': False, 'error': 'Missing audio_base64'}
 
             if requests is None:
                 _logger.error("requests library not installed")
                 return {'success': False, 'error': 'requests library not installed in Odoo container'}
 
-            api_url = self._get_api_url()
-            timeout = self._get_api_timeout()
-            _logger.info(f"API URL: {api_url}, Timeout: {timeout}")
+            transcription = request.env['medical.transcription'].browse(transcription_id)
+            if not transcription.exists():
+                return {'success': False, 'error': f'Transcription {transcription_id} not found'}
 
-            # Decode base64 audio
-            _logger.info(f"Decoding audio base64 (length: {len(audio_base64)})")
-            try:
-                audio_bytes = base64.b64decode(audio_base64)
-                _logger.info(f"Audio decoded, size: {len(audio_bytes)} bytes")
-            except Exception as e:
-                _logger.error(f"Failed to decode audio: {e}")
-                return {'success': False, 'error': f'Failed to decode audio: {str(e)}'}
+            timing = request.env['medical.transcription.timing']
+            # Store the audio on the record unless it was already uploaded
+            if audio_base64:
+                try:
+                    with timing._timed('transcribe.decode', template_type):
+                        base64.b64decode(audio_base64, validate=True)
+                except Exception as e:
+                    _logger.error(f"Failed to decode audio: {e}")
+                    return {'success': False, 'error': f'Failed to decode audio: {str(e)}'}
+                with timing._timed('transcribe.store_audio', template_type):
+                    transcription.write({
+                        'audio_file': audio_base64,
+                        'audio_filename': audio_filename,
+                    })
+            elif not transcription.with_context(bin_size=True).audio_file:
+                return {'success': False, 'error': 'Missing audio_base64'}
 
             # Get template fields from the transcription record if not provided
             if template_fields is None:
                 try:
-                    transcription = request.env['medical.transcription'].browse(transcription_id)
-                    if transcription.template_fields_json:
-                        template_fields = json.loads(transcription.template_fields_json)
-                except:
+                    template_fields = transcription.get_template_fields()
+                except ValueError:
                     template_fields = []
 
-            # Convert template fields to the format expected by Flask API
-            fields_for_api = []
-            if template_fields:
-                for field in template_fields:
-                    if isinstance(field, dict):
-                        fields_for_api.append({
-                            'key': field.get('key', ''),
-                            'label': field.get('label', field.get('key', ''))
-                        })
-                    elif isinstance(field, str):
-                        fields_for_api.append(field)
-
-            # Prepare multipart form data
-            files = {
-                'audio': (audio_filename, audio_bytes)
-            }
-            data = {
-                'fields': json.dumps(fields_for_api) if fields_for_api else '[]',
-                'allow_additional': 'true',
-                'input_language': input_language,
-                'output_language': output_language
-            }
-            _logger.info(f"Calling Flask API: POST {api_url}/api/medical/transcribe with fields: {fields_for_api}")
-
-            # Call Flask API
-            try:
-                response = requests.post(
-                    f'{api_url}/api/medical/transcribe',
-                    files=files,
-                    data=data,
-                    timeout=timeout
-                )
-                _logger.info(f"Flask API response status: {response.status_code}")
-                response.raise_for_status()
-                result = response.json()
-                _logger.info(f"Flask API response success: {result.get('success')}")
-            except requests.Timeout as e:
-                _logger.error(f"API timeout after {timeout}s: {e}")
-                return {'success': False, 'error': f'API timeout after {timeout} seconds'}
-            except requests.ConnectionError as e:
-                _logger.error(f"Cannot connect to API at {api_url}: {e}")
-                return {'success': False, 'error': f'Cannot connect to API at {api_url}. Check if Flask is running and URL is correct.'}
-            except requests.RequestException as e:
-                _logger.error(f"API request error: {e}")
-                return {'success': False, 'error': f'API request error: {str(e)}'}
-
-            # Update transcription record
-            if result.get('success'):
-                _logger.info(f"Updating Odoo record {transcription_id}")
-                try:
-                    transcription = request.env['medical.transcription'].browse(
-                        transcription_id
-                    )
-
-                    # Combine all extracted data
-                    extracted_data = result.get('extracted_data', {})
-                    # Also include requested_fields and additional_fields if present
-                    if result.get('requested_fields'):
-                        extracted_data.update(result.get('requested_fields', {}))
-                    if result.get('additional_fields'):
-                        extracted_data.update(result.get('additional_fields', {}))
-
-                    transcription.write({
-                        'api_transcription_id': result.get('transcription_id'),
-                        'whisper_transcription': result.get('whisper_transcription') or result.get('full_text', ''),
-                        'cleaned_text': result.get('cleaned_text', ''),
-                        'medical_report': result.get('medical_report', ''),
-                        'extracted_data_json': json.dumps(
-                            extracted_data,
-                            ensure_ascii=False
-                        ),
-                        'state': 'review'
-                    })
-                    _logger.info(f"Record {transcription_id} updated successfully")
-
-                    # Add template info to result for frontend
-                    result['template'] = {
-                        'fields': template_fields if template_fields else []
-                    }
-
-                except Exception as e:
-                    _logger.error(f"Failed to update record: {e}\n{traceback.format_exc()}")
-                    return {'success': False, 'error': f'Failed to update record: {str(e)}'}
-
-                # Download and store PDF if available
-                if result.get('files', {}).get('pdf'):
-                    self._download_and_store_file(
-                        transcription,
-                        result['files']['pdf'],
-                        'pdf'
-                    )
-
-                # Download and store JSON if available
-                if result.get('files', {}).get('json'):
-                    self._download_and_store_file(
-                        transcription,
-                        result['files']['json'],
-                        'json'
-                    )
-
-            _logger.info(f"=== TRANSCRIBE END === success={result.get('success')}")
-            return result
+            with timing._timed('transcribe.enqueue', template_type):
+                transcription.write({'state': 'transcribing', 'error_message': False})
+                job = request.env['medical.transcription.job']._enqueue(transcription, {
+                    'audio_filename': audio_filename,
+                    'template_type': template_type,
+                    'template_fields': template_fields or [],
+                    'input_language': input_language,
+                    'output_language': output_language,
+                })
+            _logger.log(self._get_log_level(), f"=== TRANSCRIBE QUEUED === id={transcription_id}, job={job.id}")
+            return {'success': True, 'job_id': job.id, 'state': job.state}
 
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
             _logger.error(f"TRANSCRIBE ERROR: {error_msg}\n{traceback.format_exc()}")
+            return {'success': False, 'error': error_msg}
 
-            # Try to update record with error state
-            try:
-                transcription = request.env['medical.transcription'].browse(transcription_id)
-                transcription.write({
-                    'state': 'error',
-                    'error_message': error_msg
+    @http.route(
+        '/medical_transcription/transcribe_bulk',
+        type='http',
+        auth='user',
+        methods=['POST']
+    )
+    @timed('transcribe_bulk')
+    def transcribe_bulk(self, settings='{}', **kwargs):
+        """Queue many audio files for transcription in one request.
+
+        Expects a multipart body with one ``audio`` part per file and a
+        ``settings`` JSON value: either one object applied to every file or a
+        list of objects in file order (``template_type``, ``template_name``,
+        ``template_fields``, ``input_language``, ``output_language``).
+        Records and jobs are created in batch; the jobs are dispatched to
+        the API with a bounded concurrency.
+        """
+        uploads = request.httprequest.files.getlist('audio')
+        if not uploads:
+            return request.make_json_response(
+                {'success': False, 'error': 'Missing audio files'}, status=400)
+        try:
+            settings = json.loads(settings or '{}')
+        except ValueError as e:
+            return request.make_json_response(
+                {'success': False, 'error': f'Invalid settings: {e}'}, status=400)
+        if isinstance(settings, dict):
+            settings = [settings] * len(uploads)
+        if not isinstance(settings, list) or len(settings) != len(uploads):
+            return request.make_json_response(
+                {'success': False, 'error': 'settings must be an object or a list matching the audio files'},
+                status=400)
+
+        try:
+            vals_list = []
+            params_list = []
+            for upload, item in zip(uploads, settings):
+                template_fields = item.get('template_fields') or []
+                vals_list.append({
+                    'template_type': item.get('template_type', ''),
+                    'template_name': item.get('template_name') or item.get('template_type', ''),
+                    'audio_filename': upload.filename or 'audio.wav',
+                    'template_fields_json': json.dumps(template_fields, ensure_ascii=False),
+                    'state': 'transcribing',
+                })
+                params_list.append({
+                    'audio_filename': upload.filename or 'audio.wav',
+                    'template_type': item.get('template_type', ''),
+                    'template_fields': template_fields,
+                    'input_language': item.get('input_language', 'fr'),
+                    'output_language': item.get('output_language', 'fr'),
                 })
-            except:
-                pass
 
-            return {'success': False, 'error': error_msg}
+            transcriptions = request.env['medical.transcription'].create(vals_list)
+            for transcription, upload in zip(transcriptions, uploads):
+                with upload.stream as spool:
+                    transcription._store_binary_from_file('audio_file', spool, mimetype=upload.mimetype or None)
+            jobs = request.env['medical.transcription.job']._enqueue_batch(transcriptions, params_list)
+            _logger.log(self._get_log_level(), f"=== TRANSCRIBE BULK QUEUED === {len(jobs)} job(s)")
+
+            return request.make_json_response({
+                'success': True,
+                'transcriptions': [{
+                    'transcription_id': job.transcription_id.id,
+                    'name': job.transcription_id.name,
+                    'job_id': job.id,
+                } for job in jobs],
+            })
+        except Exception as e:
+            _logger.error(f"TRANSCRIBE BULK ERROR: {e}\n{traceback.format_exc()}")
+            return request.make_json_response(
+                {'success': False, 'error': f"Unexpected error: {str(e)}"}, status=500)
+
+    @http.route('/medical_transcription/job_status', type='json', auth='user')
+    @timed('job_status')
+    def job_status(self, job_id=None, job_ids=None):
+        """Return the state of a transcription job, with its result once done.
+
+        With ``job_ids``, returns ``{'success': True, 'jobs': [...]}`` for all
+        the given jobs at once.
+        """
+        if job_ids is not None:
+            jobs = request.env['medical.transcription.job'].browse(job_ids).exists()
+            return {'success': True, 'jobs': [job._get_status() for job in jobs]}
+        job = request.env['medical.transcription.job'].browse(job_id).exists()
+        if not job:
+            return {'success': False, 'error': f'Job {job_id} not found'}
+        return job._get_status()
+
+    @http.route('/medical_transcription/search', type='json', auth='user')
+    @timed('search')
+    def search_transcriptions(self, query, limit=20, offset=0, state=None, template_type=None):
+        """Full-text search over reports and transcripts, best matches first.
+
+        ``query`` accepts words, "quoted phrases", ``or`` and ``-excluded``
+        words. Returns ``{'success': True, 'total': n, 'results': [...]}``
+        with a highlighted ``snippet`` (HTML) per result.
+        """
+        if not (query or '').strip():
+            return {'success': False, 'error': 'Missing search query'}
+        domain = []
+        if state:
+            domain.append(('state', '=', state))
+        if template_type:
+            domain.append(('template_type', '=', template_type))
+        try:
+            result = request.env['medical.transcription']._search_ranked(
+                query.strip(),
+                domain=domain,
+                limit=min(max(int(limit), 1), 100),
+                offset=max(int(offset), 0),
+            )
+        except (TypeError, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+        return dict(result, success=True)
 
     @http.route('/medical_transcription/validate', type='json', auth='user')
+    @timed('validate')
     def validate(self, transcription_id, validated_data, validated_report):
         """Send validated data to Flask API"""
         try:
             if requests is None:
                 return {'success': False, 'error': 'requests library not installed'}
 
-            api_url = self._get_api_url()
-
             transcription = request.env['medical.transcription'].browse(
                 transcription_id
             )
 
+            timing = request.env['medical.transcription.timing']
+            with timing._timed('validate.check', transcription.template_type):
+                errors = transcription._check_validated_data(validated_data, validated_report)
+            if errors:
+                return {
+                    'success': False,
+                    'error': f'Invalid data: {template_validator.format_errors(errors)}',
+                    'field_errors': errors,
+                }
+
+            if not transcription.api_transcription_id and transcription.cached_source_id:
+                # The API transcription is the source record's, leave it untouched
+                with timing._timed('validate.write', transcription.template_type):
+                    transcription._validate_locally(validated_data, validated_report)
+                return {'success': True, 'local': True}
+
             payload = {
                 'transcription_id': transcription.api_transcription_id,
                 'validated_report': validated_report,
                 'validated_data': validated_data
             }
 
-            _logger.info(f"Validating transcription {transcription_id}")
+            _logger.log(self._get_log_level(), f"Validating transcription {transcription_id}")
 
-            response = requests.post(
-                f'{api_url}/api/medical/validate',
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
-            result = response.json()
+            with timing._timed('validate.api_call', transcription.template_type):
+                response = request.env['medical.transcription.api']._request(
+                    'POST',
+                    '/api/medical/validate',
+                    json=payload,
+                    timeout=60,
+                    api_url=transcription._get_api_backend()
+                )
+                response.raise_for_status()
+                result = response.json()
 
             if result.get('success'):
-                transcription.write({
-                    'validated_data_json': json.dumps(
-                        validated_data,
-                        ensure_ascii=False
-                    ),
-                    'medical_report': validated_report,
-                    'state': 'validated'
-                })
+                with timing._timed('validate.write', transcription.template_type):
+                    transcription.write({
+                        'validated_data_json': json.dumps(
+                            validated_data,
+                            ensure_ascii=False
+                        ),
+                        'medical_report': validated_report,
+                        'state': 'validated'
+                    })
 
-                # Download validated PDF if available
-                if result.get('files', {}).get('validated_pdf'):
-                    self._download_and_store_file(
-                        transcription,
-                        result['files']['validated_pdf'],
-                        'pdf'
-                    )
+                # Download validated PDF in the background if available
+                request.env['medical.transcription.job']._enqueue_artifacts(transcription, [
+                    (result.get('files', {}).get('validated_pdf'), 'pdf'),
+                ])
 
             return result
 
@@ -308,45 +538,135 @@ class TranscriptionController(http.Controller):
             _logger.error(f"Unexpected error validating: {e}\n{traceback.format_exc()}")
             return {'success': False, 'error': f"Unexpected error: {str(e)}"}
 
+    @http.route('/medical_transcription/validate_bulk', type='json', auth='user')
+    @timed('validate_bulk')
+    def validate_bulk(self, items=None, transcription_ids=None):
+        """Validate many transcriptions in one call.
+
+        ``items`` is a list of ``{transcription_id, validated_data,
+        validated_report}``; ``transcription_ids`` validates records with
+        their current data and report. Returns ``{'success': True,
+        'validated': n, 'results': [{transcription_id, success, error,
+        field_errors}]}``; data failing the template checks is not sent.
+        """
+        try:
+            if requests is None:
+                return {'success': False, 'error': 'requests library not installed'}
+
+            entries = {
+                item['transcription_id']: (item.get('validated_data'), item.get('validated_report'))
+                for item in items or []
+            }
+            ids = list(dict.fromkeys([*entries, *(transcription_ids or [])]))
+            transcriptions = request.env['medical.transcription'].browse(ids).exists()
+            _logger.log(self._get_log_level(), f"Validating {len(transcriptions)} transcription(s)")
+
+            outcomes = transcriptions._validate_batch(entries)
+            results = []
+            for transcription_id in ids:
+                outcome = outcomes.get(transcription_id) or {'success': False, 'error': 'Transcription not found'}
+                results.append({
+                    'transcription_id': transcription_id,
+                    'success': bool(outcome.get('success')),
+                    'error': outcome.get('error'),
+                    'field_errors': outcome.get('field_errors') or [],
+                })
+            return {
+                'success': True,
+                'validated': sum(result['success'] for result in results),
+                'results': results,
+            }
+        except Exception as e:
+            _logger.error(f"Unexpected error validating: {e}\n{traceback.format_exc()}")
+            return {'success': False, 'error': f"Unexpected error: {str(e)}"}
+
     @http.route(
         '/medical_transcription/download/<int:transcription_id>/<string:file_type>',
         type='http',
         auth='user'
     )
+    @timed('download')
     def download_file(self, transcription_id, file_type):
-        """Download generated files (PDF/JSON)"""
+        """Download generated files (PDF/JSON).
+
+        The file is streamed from the filestore (X-Sendfile / X-Accel when
+        enabled) with an ETag based on the attachment checksum, so browsers
+        get ``304 Not Modified`` on re-open and can request byte ranges.
+        """
         transcription = request.env['medical.transcription'].browse(
             transcription_id
-        )
+        ).exists()
+        if not transcription or file_type not in transcription.ARTIFACT_FIELDS:
+            return request.not_found()
 
-        if file_type == 'pdf' and transcription.pdf_file:
-            return request.make_response(
-                base64.b64decode(transcription.pdf_file),
-                headers=[
-                    ('Content-Type', 'application/pdf'),
-                    ('Content-Disposition',
-                     f'attachment; filename="{transcription.pdf_filename}"')
-                ]
-            )
-        elif file_type == 'json' and transcription.json_file:
-            return request.make_response(
-                base64.b64decode(transcription.json_file),
-                headers=[
-                    ('Content-Type', 'application/json'),
-                    ('Content-Disposition',
-                     f'attachment; filename="{transcription.json_filename}"')
-                ]
+        field_name, filename_field, mimetype = transcription.ARTIFACT_FIELDS[file_type]
+        try:
+            stream = request.env['ir.binary']._get_stream_from(
+                transcription,
+                field_name,
+                filename=transcription[filename_field] or f'{transcription.name}.{file_type}',
+                mimetype=mimetype,
             )
+        except MissingError:
+            return request.not_found()
+        return stream.get_response(as_attachment=True)
 
-        return request.not_found()
+    @http.route(
+        '/medical_transcription/audio/<int:transcription_id>',
+        type='http',
+        auth='user'
+    )
+    @timed('audio')
+    def download_audio(self, transcription_id):
+        """Download the recording of a transcription.
+
+        Recordings still in the filestore are streamed like the other files;
+        archived ones are restored from cold storage into the warm cache first.
+        """
+        transcription = request.env['medical.transcription'].browse(
+            transcription_id
+        ).exists()
+        if not transcription:
+            return request.not_found()
+        transcription.check_access_rights('read')
+        transcription.check_access_rule('read')
+
+        filename, mimetype = transcription._get_audio_download_info()
+        if transcription.audio_storage != 'cold':
+            try:
+                stream = request.env['ir.binary']._get_stream_from(
+                    transcription, 'audio_file', filename=filename, mimetype=mimetype)
+            except MissingError:
+                return request.not_found()
+            return stream.get_response(as_attachment=True)
+
+        try:
+            fileobj = transcription._open_cold_audio()
+        except ValidationError as e:
+            _logger.error(f"Error restoring recording: {e}")
+            return request.not_found()
+        size = os.fstat(fileobj.fileno()).st_size
+        return request.make_response(
+            wrap_file(request.httprequest.environ, fileobj, UPLOAD_CHUNK_SIZE),
+            headers=[
+                ('Content-Type', mimetype),
+                ('Content-Length', str(size)),
+                ('Content-Disposition', content_disposition(filename)),
+            ]
+        )
 
     @http.route(
         '/medical_transcription/report/<int:transcription_id>',
         type='http',
         auth='user'
     )
+    @timed('report')
     def download_report(self, transcription_id):
-        """Generate and download PDF report using Odoo QWeb"""
+        """Download the PDF report generated with Odoo QWeb.
+
+        The PDF is rendered once and kept as an attachment until the record
+        data changes; later downloads stream the cached file.
+        """
         try:
             transcription = request.env['medical.transcription'].browse(
                 transcription_id
@@ -354,52 +674,170 @@ class TranscriptionController(http.Controller):
             if not transcription.exists():
                 return request.not_found()
 
-            # Generate PDF using Odoo's report engine
-            report = request.env.ref('medical_transcription.action_report_medical_transcription')
-            pdf_content, _ = report._render_qweb_pdf(
-                'medical_transcription.report_transcription_document',
-                [transcription_id]
-            )
+            attachment = transcription._get_report_attachments()[transcription.id]
+            if not attachment:
+                return request.not_found()
 
             filename = f"Rapport_Medical_{transcription.name}.pdf"
-
-            return request.make_response(
-                pdf_content,
-                headers=[
-                    ('Content-Type', 'application/pdf'),
-                    ('Content-Disposition', f'attachment; filename="{filename}"')
-                ]
+            stream = request.env['ir.binary']._get_stream_from(
+                attachment,
+                filename=filename,
+                mimetype='application/pdf',
             )
+            return stream.get_response(as_attachment=True)
         except Exception as e:
             _logger.error(f"Error generating PDF report: {e}\n{traceback.format_exc()}")
             return request.not_found()
 
-    def _download_and_store_file(self, transcription, file_path, file_type):
-        """Download file from Flask API and store in Odoo"""
-        try:
-            api_url = self._get_api_url()
-            _logger.info(f"Downloading file: {api_url}{file_path}")
+    @http.route('/medical_transcription/reports', type='http', auth='user')
+    @timed('reports')
+    def download_reports(self, ids=''):
+        """Download the PDF reports of several transcriptions as a ZIP file.
 
-            response = requests.get(
-                f'{api_url}{file_path}',
-                timeout=30
-            )
-            response.raise_for_status()
+        Missing or outdated PDFs are rendered in batches; the archive is
+        spooled to a temporary file and streamed. Reports that could not be
+        rendered are listed in ``MISSING_REPORTS_NAME``.
+        """
+        try:
+            record_ids = [int(record_id) for record_id in ids.split(',') if record_id.strip()]
+        except ValueError:
+            return request.not_found()
+        transcriptions = request.env['medical.transcription'].browse(record_ids).exists()
+        if not transcriptions:
+            return request.not_found()
 
-            filename = file_path.split('/')[-1]
-            file_content = base64.b64encode(response.content)
+        try:
+            attachments = transcriptions._get_report_attachments()
+            spool = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_SIZE)
+            missing = []
+            with zipfile.ZipFile(spool, 'w', zipfile.ZIP_STORED) as archive:
+                for transcription in transcriptions:
+                    attachment = attachments.get(transcription.id)
+                    if not attachment:
+                        missing.append(transcription.name)
+                        continue
+                    arcname = f"Rapport_Medical_{transcription.name}.pdf".replace('/', '_')
+                    if attachment.store_fname:
+                        archive.write(attachment._full_path(attachment.store_fname), arcname)
+                    else:
+                        archive.writestr(arcname, attachment.raw)
+                if missing:
+                    _logger.warning(f"No PDF report for {len(missing)} transcription(s): {', '.join(missing)}")
+                    archive.writestr(MISSING_REPORTS_NAME, 'Rapports non generes :\n' + '\n'.join(missing) + '\n')
+            size = spool.tell()
+            spool.seek(0)
+        except Exception as e:
+            _logger.error(f"Error generating PDF reports: {e}\n{traceback.format_exc()}")
+            return request.not_found()
 
-            if file_type == 'pdf':
-                transcription.write({
-                    'pdf_file': file_content,
-                    'pdf_filename': filename
-                })
-            elif file_type == 'json':
-                transcription.write({
-                    'json_file': file_content,
-                    'json_filename': filename
-                })
+        return request.make_response(
+            wrap_file(request.httprequest.environ, spool, UPLOAD_CHUNK_SIZE),
+            headers=[
+                ('Content-Type', 'application/zip'),
+                ('Content-Length', str(size)),
+                ('Content-Disposition', 'attachment; filename="Rapports_Medicaux.zip"'),
+            ]
+        )
 
-            _logger.info(f"File {filename} stored successfully")
-        except Exception as e:
-            _logger.warning(f"Failed to download file {file_path}: {e}")
+    @http.route('/medical_transcription/export', type='http', auth='user', methods=['GET'])
+    @timed('export')
+    def export(self, format='ndjson', date_from=None, date_to=None, state=None, template_type=None):
+        """Stream transcriptions as NDJSON (one object per line) or CSV.
+
+        Filters: ``date_from`` / ``date_to`` (creation dates, inclusive,
+        ``YYYY-MM-DD``), ``state`` and ``template_type``. Rows are read by
+        batches on a dedicated cursor while the response is sent, so memory
+        does not grow with the export size.
+        """
+        if format not in EXPORT_FORMATS:
+            return request.make_json_response(
+                {'success': False, 'error': f'Unsupported format "{format}"'}, status=400)
+        domain = []
+        try:
+            if date_from:
+                domain.append(('create_date', '>=', fields.Date.to_date(date_from)))
+            if date_to:
+                domain.append(('create_date', '<', fields.Date.add(fields.Date.to_date(date_to), days=1)))
+        except ValueError as e:
+            return request.make_json_response({'success': False, 'error': str(e)}, status=400)
+        if state:
+            domain.append(('state', '=', state))
+        if template_type:
+            domain.append(('template_type', '=', template_type))
+        request.env['medical.transcription'].check_access_rights('read')
+
+        # The request cursor is closed once the route returns: the rows are
+        # read from a cursor owned by the generator, which must not use request
+        registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+        columns = [*request.env['medical.transcription'].EXPORT_COLUMNS, 'patient_info', 'clinical_data']
+        log_level = self._get_log_level()
+
+        def generate():
+            start = time.perf_counter()
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                rows = env['medical.transcription']._iter_export_rows(domain, batch_size=EXPORT_BATCH_SIZE)
+                if format == 'csv':
+                    yield from self._export_csv(rows, columns)
+                else:
+                    yield from self._export_ndjson(rows)
+                env['medical.transcription.timing']._record('export.stream', time.perf_counter() - start)
+            _logger.log(log_level, f"Exported transcriptions as {format} in {time.perf_counter() - start:.1f}s")
+
+        filename = f'transcriptions_{fields.Date.today()}.{format}'
+        return request.make_response(generate(), headers=[
+            ('Content-Type', EXPORT_FORMATS[format]),
+            ('Content-Disposition', content_disposition(filename)),
+            ('Cache-Control', 'no-store'),
+        ])
+
+    def _export_ndjson(self, rows):
+        """Encode export rows as NDJSON, one chunk per batch"""
+        lines = []
+        for row in rows:
+            row['create_date'] = row['create_date'] and row['create_date'].isoformat()
+            lines.append(json.dumps(row, ensure_ascii=False))
+            if len(lines) == EXPORT_BATCH_SIZE:
+                yield ('\n'.join(lines) + '\n').encode()
+                lines = []
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode()
+
+    def _export_csv(self, rows, columns):
+        """Encode export rows as CSV (UTF-8 with BOM for spreadsheets), one chunk per batch"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow(columns)
+        for index, row in enumerate(rows, 1):
+            row['create_date'] = row['create_date'] and row['create_date'].isoformat()
+            row['patient_info'] = json.dumps(row['patient_info'], ensure_ascii=False)
+            row['clinical_data'] = json.dumps(row['clinical_data'], ensure_ascii=False)
+            writer.writerow([row[column] if row[column] is not None else '' for column in columns])
+            if index % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    @http.route('/medical_transcription/metrics', type='http', auth='none', methods=['GET'])
+    def metrics(self, token=None):
+        """Stage timings (p50/p95/p99 per stage and template) for Prometheus.
+
+        Disabled until the ``medical_transcription.metrics_token`` system
+        parameter is set; the token is passed as ``?token=`` or as an
+        ``Authorization: Bearer`` header.
+        """
+        expected = request.env['ir.config_parameter'].sudo().get_param('medical_transcription.metrics_token')
+        authorization = request.httprequest.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):]
+        if not expected:
+            return request.not_found()
+        if not token or not hmac.compare_digest(token, expected):
+            return request.make_response('Invalid token\n', status=403)
+        return request.make_response(
+            request.env['medical.transcription.timing'].sudo()._render_prometheus(),
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')],
+        )
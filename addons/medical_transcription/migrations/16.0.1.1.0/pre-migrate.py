@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+JSON_COLUMNS = ['extracted_data_json', 'validated_data_json', 'template_fields_json']
+
+
+def migrate(cr, version):
+    """Prepare the JSON text columns for their conversion to ``jsonb``.
+
+    Empty strings become NULL; text that is not valid JSON is kept under a
+    ``_raw`` key so the ``::jsonb`` cast done by the ORM cannot fail.
+    """
+    for column in JSON_COLUMNS:
+        cr.execute("""
+            SELECT data_type FROM information_schema.columns
+             WHERE table_name = 'medical_transcription' AND column_name = %s
+        """, [column])
+        row = cr.fetchone()
+        if not row or row[0] != 'text':
+            continue
+
+        cr.execute(f"UPDATE medical_transcription SET {column} = NULL WHERE trim({column}) = ''")
+        cr.execute(f"SELECT id, {column} FROM medical_transcription WHERE {column} IS NOT NULL")
+        invalid = []
+        for record_id, value in cr.fetchall():
+            try:
+                json.loads(value)
+            except ValueError:
+                invalid.append((json.dumps({'_raw': value}, ensure_ascii=False), record_id))
+        if invalid:
+            _logger.warning(f"Wrapping {len(invalid)} invalid JSON value(s) of {column} under '_raw'")
+            cr.executemany(f"UPDATE medical_transcription SET {column} = %s WHERE id = %s", invalid)
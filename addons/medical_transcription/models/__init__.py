@@ -1,3 +1,8 @@
 # -*- coding: utf-8 -*-
+from . import transcription_api
+from . import transcription_api_cache
 from . import medical_transcription
+from . import medical_transcription_job
+from . import medical_transcription_timing
+from . import medical_transcription_stats
 from . import res_config_settings
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Audio processing helpers (ffmpeg, optional ``pydub``).
+
+These helpers do not use the ORM, so they can run in worker threads.
+"""
+import contextlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+try:
+    from pydub import AudioSegment
+    from pydub.silence import detect_silence
+except ImportError:
+    AudioSegment = None
+
+_logger = logging.getLogger(__name__)
+
+FFMPEG = shutil.which('ffmpeg')
+# Longest time ffmpeg may take to re-encode one recording, in seconds
+FFMPEG_TIMEOUT = 900
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Whisper works on 16 kHz mono: decoding to that format keeps long
+# recordings small in memory without losing recognition quality
+SPEECH_FRAME_RATE = 16000
+
+# Encodings of 16 kHz mono speech sent to the API: pydub export options,
+# file extension and ffmpeg output options
+SPEECH_FORMATS = {
+    'wav': ({'format': 'wav'}, 'wav', ['-c:a', 'pcm_s16le', '-f', 'wav']),
+    'flac': ({'format': 'flac'}, 'flac', ['-c:a', 'flac', '-f', 'flac']),
+    'opus': ({'format': 'ogg', 'codec': 'libopus', 'bitrate': '24k'}, 'ogg',
+             ['-c:a', 'libopus', '-b:a', '24k', '-f', 'ogg']),
+}
+
+
+def load_speech(fileobj):
+    """Decode an audio file into a 16 kHz mono ``AudioSegment``.
+
+    With ffmpeg, the file is first converted to 16 kHz mono WAV on disk,
+    so only the downmixed audio is ever held in memory.
+    """
+    if AudioSegment is None:
+        raise ImportError('pydub library not installed')
+    if FFMPEG:
+        spool, _size = normalize_speech(fileobj, 'wav')
+        with spool:
+            return AudioSegment.from_wav(spool)
+    fileobj.seek(0)
+    audio = AudioSegment.from_file(fileobj)
+    fileobj.seek(0)
+    return audio.set_channels(1).set_frame_rate(SPEECH_FRAME_RATE)
+
+
+def export_speech(audio, audio_format='wav'):
+    """Encode an ``AudioSegment`` into a temporary file.
+
+    Returns ``(fileobj, size)``, the file rewound.
+    """
+    options, _extension = SPEECH_FORMATS[audio_format]
+    spool = tempfile.TemporaryFile()
+    try:
+        audio.export(spool, **options)
+    except Exception:
+        spool.close()
+        raise
+    size = spool.seek(0, os.SEEK_END)
+    spool.seek(0)
+    return spool, size
+
+
+@contextlib.contextmanager
+def _input_path(fileobj):
+    """Path of the file behind ``fileobj``, spooled to disk if it has none"""
+    name = getattr(fileobj, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        yield name
+        return
+    fd, path = tempfile.mkstemp(suffix='.audio')
+    try:
+        with os.fdopen(fd, 'wb') as dest:
+            fileobj.seek(0)
+            shutil.copyfileobj(fileobj, dest, COPY_CHUNK_SIZE)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def normalize_speech(fileobj, audio_format='flac'):
+    """Re-encode any audio file as 16 kHz mono ``audio_format`` with ffmpeg.
+
+    ffmpeg runs as a subprocess from file to file and streams the audio,
+    so the memory used does not depend on the recording length. Returns
+    ``(fileobj, size)`` of a temporary file; ``fileobj`` is rewound.
+    """
+    if not FFMPEG:
+        raise RuntimeError('ffmpeg not found')
+    options = SPEECH_FORMATS[audio_format][2]
+    spool = tempfile.NamedTemporaryFile(suffix=f'.{SPEECH_FORMATS[audio_format][1]}')
+    try:
+        with _input_path(fileobj) as path:
+            subprocess.run(
+                [FFMPEG, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y', '-i', path,
+                 '-vn', '-ac', '1', '-ar', str(SPEECH_FRAME_RATE), *options, spool.name],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=FFMPEG_TIMEOUT,
+            )
+    except subprocess.CalledProcessError as e:
+        spool.close()
+        raise RuntimeError(f'ffmpeg failed: {e.stderr.decode(errors="replace").strip()[-500:]}') from e
+    except Exception:
+        spool.close()
+        raise
+    finally:
+        fileobj.seek(0)
+    size = os.fstat(spool.fileno()).st_size
+    spool.seek(0)
+    return spool, size
+
+
+def find_cut_points(duration_ms, silences, segment_ms):
+    """Return the boundaries of segments of about ``segment_ms``.
+
+    Each cut is made in the middle of the silence closest to the ideal
+    boundary, within half a segment of it; without such a silence the
+    audio is cut at the ideal boundary.
+    """
+    midpoints = [(start + end) // 2 for start, end in silences]
+    cuts = [0]
+    while duration_ms - cuts[-1] > segment_ms * 1.5:
+        ideal = cuts[-1] + segment_ms
+        candidates = [point for point in midpoints if abs(point - ideal) < segment_ms / 2]
+        cuts.append(min(candidates, key=lambda point: abs(point - ideal)) if candidates else ideal)
+    cuts.append(duration_ms)
+    return cuts
+
+
+def split_at_silences(fileobj, min_duration, segment_duration,
+                      silence_threshold=-40, min_silence_ms=700, audio_format='wav'):
+    """Split a long recording at silences into temporary files.
+
+    Durations are in seconds, ``silence_threshold`` in dBFS; segments are
+    encoded as ``audio_format`` (see ``SPEECH_FORMATS``). Returns a list of
+    ``(fileobj, size)`` in playback order, or an empty list when the
+    recording is shorter than ``min_duration``.
+    """
+    audio = load_speech(fileobj)
+    if len(audio) < min_duration * 1000:
+        return []
+    silences = detect_silence(
+        audio,
+        min_silence_len=min_silence_ms,
+        silence_thresh=silence_threshold,
+        seek_step=10,
+    )
+    cuts = find_cut_points(len(audio), silences, segment_duration * 1000)
+    result = []
+    try:
+        for start, end in zip(cuts, cuts[1:]):
+            result.append(export_speech(audio[start:end], audio_format))
+    except Exception:
+        for segment, _size in result:
+            segment.close()
+        raise
+    _logger.info(f"Split {len(audio) // 1000}s recording into {len(result)} segment(s)")
+    return result
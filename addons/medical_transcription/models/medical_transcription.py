@@ -1,7 +1,88 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
-from markupsafe import Markup
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from odoo.osv import expression
+from odoo.tools import config, sql
+from odoo.tools.mimetypes import guess_mimetype
+from markupsafe import Markup, escape
+import base64
+import contextlib
+import hashlib
+import io
 import json
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from . import audio_tools
+from . import template_validator
+
+_logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Text search configuration of the search_vector column (see init)
+SEARCH_CONFIG = 'french'
+# Weight of each text column in the search ranking
+SEARCH_COLUMNS = (('medical_report', 'A'), ('cleaned_text', 'B'), ('whisper_transcription', 'C'))
+# Highlight markers of ts_headline, replaced by <mark> once the snippet is escaped
+HEADLINE_START, HEADLINE_STOP = '\x02', '\x03'
+HEADLINE_OPTIONS = f'StartSel={HEADLINE_START}, StopSel={HEADLINE_STOP}, MaxFragments=2, MaxWords=20, MinWords=8'
+
+# Templates of the extracted data tables, see _json_to_html
+HTML_EMPTY = Markup('<p style="color: #999; text-align: center; padding: 20px;">Aucune donnee</p>')
+HTML_PRE = Markup('<pre>{}</pre>')
+HTML_TABLE = Markup(
+    '<div style="border:1px solid #dee2e6; border-radius:8px; overflow:hidden;">'
+    '<table style="width:100%; border-collapse:collapse; font-size:14px;">{}</table>'
+    '</div>'
+)
+HTML_ROW = Markup(
+    '<tr>'
+    '<td style="padding:10px 14px; width:30%; font-weight:600; color:#495057; '
+    'vertical-align:top; border-bottom:1px solid #e9ecef; background:#f8f9fa;">{}</td>'
+    '<td style="padding:10px 14px; color:#212529; border-bottom:1px solid #e9ecef; '
+    'white-space:pre-wrap;">{}</td>'
+    '</tr>'
+)
+HTML_NESTED_VALUE = Markup(
+    '<pre style="margin:0; background:#f8f9fa; padding:8px; border-radius:4px; '
+    'white-space:pre-wrap;">{}</pre>'
+)
+HTML_VALUE = Markup('<span>{}</span>')
+HTML_NO_VALUE = Markup('<span><em style="color:#999;">-</em></span>')
+
+
+class JsonbText(fields.Text):
+    """Text field holding a JSON document, stored in a ``jsonb`` column.
+
+    The record value is still a JSON string, so views, RPC and existing
+    callers are unchanged, while PostgreSQL validates the document and can
+    index and query its content. Note that ``jsonb`` does not keep the key
+    order of objects.
+    """
+    column_type = ('jsonb', 'jsonb')
+
+    def convert_to_column(self, value, record, values=None, validate=True):
+        if value is None or value is False or value == '':
+            return None
+        if not isinstance(value, str):
+            return json.dumps(value, ensure_ascii=False)
+        try:
+            json.loads(value)
+        except ValueError:
+            raise ValidationError(_('%s must contain valid JSON.', self.string))
+        return value
+
+    def convert_to_cache(self, value, record, validate=True):
+        # psycopg2 returns jsonb columns already parsed
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        return super().convert_to_cache(value, record, validate)
 
 
 class MedicalTranscription(models.Model):
@@ -26,17 +107,43 @@ class MedicalTranscription(models.Model):
     audio_filename = fields.Char(string='Audio Filename')
 
     # API Response Data
-    api_transcription_id = fields.Char(string='API Transcription ID', readonly=True)
+    api_transcription_id = fields.Char(string='API Transcription ID', readonly=True, index=True)
+    # API backend holding the transcription, for validation, lookup and downloads
+    api_backend_url = fields.Char(string='API Backend', readonly=True, copy=False)
     whisper_transcription = fields.Text(string='Raw Transcription', readonly=True)
     cleaned_text = fields.Text(string='Cleaned Text', readonly=True)
     medical_report = fields.Text(string='Medical Report')
 
-    # Extracted data stored as JSON
-    extracted_data_json = fields.Text(string='Extracted Data (JSON)')
-    validated_data_json = fields.Text(string='Validated Data (JSON)')
+    # Extracted data stored as JSON (jsonb columns, GIN indexed)
+    extracted_data_json = JsonbText(string='Extracted Data (JSON)')
+    validated_data_json = JsonbText(string='Validated Data (JSON)')
 
     # Template fields definition (cached from API)
-    template_fields_json = fields.Text(string='Template Fields (JSON)')
+    template_fields_json = JsonbText(string='Template Fields (JSON)')
+
+    # Parsed data, validated data preferred (memoized per transaction);
+    # also searchable, see _search_extracted_data
+    extracted_data = fields.Json(
+        string='Data',
+        compute='_compute_extracted_data',
+        search='_search_extracted_data',
+    )
+
+    # Full-text search over the report and transcripts, served by the
+    # search_vector column (see init and _search_full_text)
+    full_text = fields.Char(
+        string='Full Text',
+        compute='_compute_full_text',
+        search='_search_full_text',
+    )
+
+    # Audio retention: validated recordings are moved out of the filestore
+    # after a while and restored on demand (see _cron_archive_audio)
+    audio_storage = fields.Selection([
+        ('hot', 'Filestore'),
+        ('cold', 'Cold Storage'),
+    ], string='Audio Storage', default='hot', required=True, readonly=True, copy=False)
+    audio_cold_file = fields.Char(string='Archived Audio File', readonly=True, copy=False)
 
     # Generated files
     pdf_file = fields.Binary(string='PDF Report', attachment=True)
@@ -56,66 +163,225 @@ class MedicalTranscription(models.Model):
 
     error_message = fields.Text(string='Error Message')
 
-    # Computed HTML fields for formatted JSON display
+    # Hash of the audio and transcription settings, used to answer identical
+    # requests from this record (cleared once evicted from the result cache)
+    request_hash = fields.Char(string='Request Hash', readonly=True, copy=False, index=True)
+    # Result copied from an identical request: the API transcription belongs
+    # to the source record, so this one is validated locally only
+    cached_source_id = fields.Many2one(
+        'medical.transcription',
+        string='Result Copied From',
+        readonly=True,
+        copy=False,
+        ondelete='set null',
+    )
+
+    job_ids = fields.One2many(
+        'medical.transcription.job',
+        'transcription_id',
+        string='Jobs',
+        readonly=True,
+    )
+
+    # Formatted JSON display, rendered once when the data changes; not
+    # prefetched so list views do not load the tables
     extracted_data_html = fields.Html(
         string='Extracted Data (Formatted)',
         compute='_compute_extracted_data_html',
+        store=True,
+        prefetch=False,
         sanitize=False,
     )
     validated_data_html = fields.Html(
         string='Validated Data (Formatted)',
         compute='_compute_validated_data_html',
+        store=True,
+        prefetch=False,
         sanitize=False,
     )
 
-    @api.depends('extracted_data_json')
+    def init(self):
+        super().init()
+        # Indexes matching the history list (ordered by date, filtered by
+        # state or template) and the incremental statistics refresh
+        for name, expressions in (
+            ('create_date', ['create_date DESC']),
+            ('state_create_date', ['state', 'create_date DESC']),
+            ('template_name_create_date', ['template_name', 'create_date DESC']),
+            ('write_date', ['write_date']),
+        ):
+            sql.create_index(self.env.cr, f'{self._table}_{name}_index', self._table, expressions)
+        for column in ('extracted_data_json', 'validated_data_json'):
+            sql.create_index(
+                self.env.cr,
+                f'{self._table}_{column}_gin',
+                self._table,
+                [f'{column} jsonb_path_ops'],
+                method='gin',
+            )
+        # Generated column: PostgreSQL keeps it up to date on every write
+        if not sql.column_exists(self.env.cr, self._table, 'search_vector'):
+            document = ' || '.join(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE({column}, '')), '{weight}')"
+                for column, weight in SEARCH_COLUMNS
+            )
+            self.env.cr.execute(f"""
+                ALTER TABLE {self._table}
+                ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({document}) STORED
+            """)
+        sql.create_index(
+            self.env.cr,
+            f'{self._table}_search_vector_gin',
+            self._table,
+            ['search_vector'],
+            method='gin',
+        )
+
+    @api.depends('extracted_data_json', 'validated_data_json', 'template_fields_json')
+    def _compute_extracted_data(self):
+        for record in self:
+            data = json.loads(record.validated_data_json or record.extracted_data_json or '{}')
+            record.extracted_data = record._sort_by_template(data) if isinstance(data, dict) else {}
+
+    def _sort_by_template(self, data):
+        """Order data keys like the template fields (jsonb sorts them by length)"""
+        template_keys = [
+            field.get('key') if isinstance(field, dict) else field
+            for field in self.get_template_fields()
+        ]
+        position = {key: index for index, key in enumerate(template_keys)}
+        return dict(sorted(data.items(), key=lambda item: position.get(item[0], len(position))))
+
+    @api.model
+    def _search_extracted_data(self, operator, value):
+        """Search the data in SQL, preferring validated data like get_extracted_data.
+
+        - ``('extracted_data', '=', {'nom': 'Dupont'})``: JSON containment,
+          served by the GIN indexes;
+        - ``('extracted_data', 'ilike', ('motif_de_consultation', 'fievre'))``
+          (or ``'='`` with a ``(key, value)`` pair): match on one key.
+        """
+        if operator == '=' and isinstance(value, dict):
+            query = f"""
+                SELECT id FROM {self._table}
+                 WHERE validated_data_json @> %s::jsonb
+                    OR (validated_data_json IS NULL AND extracted_data_json @> %s::jsonb)
+            """
+            document = json.dumps(value, ensure_ascii=False)
+            return [('id', 'inselect', (query, [document, document]))]
+        if operator in ('=', 'ilike') and isinstance(value, (list, tuple)) and len(value) == 2:
+            key, term = value
+            comparison = 'ILIKE' if operator == 'ilike' else '='
+            if operator == 'ilike':
+                term = f'%{term}%'
+            query = f"""
+                SELECT id FROM {self._table}
+                 WHERE COALESCE(validated_data_json, extracted_data_json) ->> %s {comparison} %s
+            """
+            return [('id', 'inselect', (query, [key, str(term)]))]
+        raise ValidationError(_('Unsupported search on extracted data: %s %r', operator, value))
+
+    def _compute_full_text(self):
+        self.full_text = False
+
+    @api.model
+    def _search_full_text(self, operator, value):
+        """Match the report and transcripts against a web-style query.
+
+        ``value`` accepts the ``websearch_to_tsquery`` syntax: words,
+        ``"quoted phrases"``, ``or`` and ``-excluded`` words; words are
+        stemmed, so ``douleurs`` also finds ``douleur``.
+        """
+        if operator not in ('=', 'ilike') or not isinstance(value, str):
+            raise ValidationError(_('Unsupported full-text search: %s %r', operator, value))
+        query = f"""
+            SELECT id FROM {self._table}
+             WHERE search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', %s)
+        """
+        return [('id', 'inselect', (query, [value]))]
+
+    @api.model
+    def _search_ranked(self, text, domain=None, limit=20, offset=0):
+        """Full-text search ordered by relevance.
+
+        Returns ``{'total': n, 'results': [...]}`` where each result has the
+        record summary, its rank and a highlighted snippet of the matching
+        text. Access rules apply; snippets are only built for the page.
+        """
+        query = self._search(expression.AND([domain or [], [('full_text', '=', text)]]))
+        subquery, params = query.select(f'"{self._table}".id')
+        self.env.cr.execute(f"SELECT count(*) FROM ({subquery}) AS hits", params)
+        total = self.env.cr.fetchone()[0]
+
+        document = " || ' ' || ".join(f"COALESCE(t.{column}, '')" for column, _weight in SEARCH_COLUMNS)
+        self.env.cr.execute(f"""
+            WITH page AS (
+                SELECT t.id, ts_rank_cd(t.search_vector, q) AS rank
+                  FROM {self._table} t, websearch_to_tsquery('{SEARCH_CONFIG}', %s) q
+                 WHERE t.id IN ({subquery})
+              ORDER BY rank DESC, t.id DESC
+                 LIMIT %s OFFSET %s
+            )
+            SELECT page.id, page.rank,
+                   ts_headline('{SEARCH_CONFIG}', {document}, websearch_to_tsquery('{SEARCH_CONFIG}', %s), %s)
+              FROM page JOIN {self._table} t ON t.id = page.id
+          ORDER BY page.rank DESC, page.id DESC
+        """, [text, *params, limit, offset, text, HEADLINE_OPTIONS])
+        rows = self.env.cr.fetchall()
+
+        records = self.browse([row[0] for row in rows])
+        results = []
+        for (record_id, rank, headline), record in zip(rows, records):
+            snippet = str(escape(headline or '')).replace(
+                HEADLINE_START, '<mark>').replace(HEADLINE_STOP, '</mark>')
+            results.append({
+                'id': record_id,
+                'name': record.name,
+                'template_name': record.template_name,
+                'state': record.state,
+                'api_transcription_id': record.api_transcription_id,
+                'create_date': fields.Datetime.to_string(record.create_date),
+                'rank': rank,
+                'snippet': snippet,
+            })
+        return {'total': total, 'results': results}
+
+    @api.depends('extracted_data_json', 'template_fields_json')
     def _compute_extracted_data_html(self):
         for record in self:
             record.extracted_data_html = record._json_to_html(record.extracted_data_json)
 
-    @api.depends('validated_data_json')
+    @api.depends('validated_data_json', 'template_fields_json')
     def _compute_validated_data_html(self):
         for record in self:
             record.validated_data_html = record._json_to_html(record.validated_data_json)
 
     def _json_to_html(self, json_string):
-        """Convert a JSON string to a formatted HTML table"""
+        """Convert a JSON string to a formatted HTML table.
+
+        Values are escaped by the ``HTML_*`` templates.
+        """
         if not json_string:
-            return Markup('<p style="color: #999; text-align: center; padding: 20px;">Aucune donnee</p>')
+            return HTML_EMPTY
         try:
             data = json.loads(json_string)
         except (json.JSONDecodeError, TypeError):
-            return Markup('<pre>%s</pre>') % json_string
+            return HTML_PRE.format(json_string)
 
         if not isinstance(data, dict):
-            return Markup('<pre>%s</pre>') % json.dumps(data, indent=4, ensure_ascii=False)
+            return HTML_PRE.format(json.dumps(data, indent=4, ensure_ascii=False))
 
+        row_template = HTML_ROW.format
         rows = []
-        for key, value in data.items():
-            label = key.replace('_', ' ').title()
+        for key, value in self._sort_by_template(data).items():
             if isinstance(value, (dict, list)):
-                display_value = json.dumps(value, indent=2, ensure_ascii=False)
-                val_html = '<pre style="margin:0; background:#f8f9fa; padding:8px; border-radius:4px; white-space:pre-wrap;">%s</pre>' % display_value
+                value_html = HTML_NESTED_VALUE.format(json.dumps(value, indent=2, ensure_ascii=False))
+            elif value:
+                value_html = HTML_VALUE.format(value)
             else:
-                val_html = '<span>%s</span>' % (value if value else '<em style="color:#999;">-</em>')
-            rows.append(
-                '<tr>'
-                '<td style="padding:10px 14px; width:30%%; font-weight:600; color:#495057; '
-                'vertical-align:top; border-bottom:1px solid #e9ecef; background:#f8f9fa;">%s</td>'
-                '<td style="padding:10px 14px; color:#212529; border-bottom:1px solid #e9ecef; '
-                'white-space:pre-wrap;">%s</td>'
-                '</tr>' % (label, val_html)
-            )
-
-        html = (
-            '<div style="border:1px solid #dee2e6; border-radius:8px; overflow:hidden;">'
-            '<table style="width:100%%; border-collapse:collapse; font-size:14px;">'
-            '%s'
-            '</table>'
-            '</div>'
-        ) % ''.join(rows)
-
-        return Markup(html)
+                value_html = HTML_NO_VALUE
+            rows.append(row_template(key.replace('_', ' ').title(), value_html))
+        return HTML_TABLE.format(Markup().join(rows))
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -126,6 +392,21 @@ class MedicalTranscription(models.Model):
                 ) or 'New'
         return super().create(vals_list)
 
+    def unlink(self):
+        self.env.cr.execute(
+            f"SELECT DISTINCT create_date::date FROM {self._table} WHERE id = ANY(%s)", [self.ids])
+        days = [row[0] for row in self.env.cr.fetchall()]
+        result = super().unlink()
+        # Deleted records do not show up in the incremental refresh
+        self.env['medical.transcription.stats'].sudo()._mark_dirty(days)
+        return result
+
+    def write(self, vals):
+        if vals.get('audio_file') and 'audio_storage' not in vals:
+            # A new recording replaces the archived one
+            vals = dict(vals, audio_storage='hot', audio_cold_file=False)
+        return super().write(vals)
+
     PATIENT_INFO_KEYS = [
         'nom', 'prenom', 'age', 'sexe', 'date_de_naissance',
         'numero_securite_sociale', 'adresse', 'telephone',
@@ -136,11 +417,7 @@ class MedicalTranscription(models.Model):
 
     def get_extracted_data(self):
         """Return extracted data as Python dict, preferring validated data"""
-        if self.validated_data_json:
-            return json.loads(self.validated_data_json)
-        if self.extracted_data_json:
-            return json.loads(self.extracted_data_json)
-        return {}
+        return dict(self.extracted_data or {})
 
     def get_patient_info(self):
         """Return patient identification fields only"""
@@ -154,12 +431,234 @@ class MedicalTranscription(models.Model):
         return {k: v for k, v in data.items()
                 if k.lower() not in self.PATIENT_INFO_KEYS}
 
+    # Columns of the bulk export, before the patient_info and clinical_data split
+    EXPORT_COLUMNS = ('id', 'name', 'create_date', 'state', 'template_type', 'template_name',
+                      'api_transcription_id', 'medical_report')
+
+    @api.model
+    def _iter_export_rows(self, domain, batch_size=1000):
+        """Yield the export rows of the records matching ``domain``, by id.
+
+        Records are read in SQL by keyset pagination (``id > last id``), so
+        every batch is an index scan whatever the export size and nothing
+        accumulates in the ORM cache; the JSON data is decoded once, by
+        psycopg2. Rows hold ``EXPORT_COLUMNS`` plus the ``patient_info`` and
+        ``clinical_data`` split of ``get_extracted_data``. Access rules apply.
+        """
+        columns = [f'"{self._table}"."{column}"' for column in self.EXPORT_COLUMNS]
+        data_column = (f'COALESCE("{self._table}"."validated_data_json", '
+                       f'"{self._table}"."extracted_data_json")')
+        last_id = 0
+        while True:
+            query = self._search(expression.AND([domain, [('id', '>', last_id)]]), order='id', limit=batch_size)
+            self.env.cr.execute(*query.select(*columns, data_column))
+            rows = self.env.cr.fetchall()
+            for *values, data in rows:
+                row = dict(zip(self.EXPORT_COLUMNS, values))
+                data = data if isinstance(data, dict) else {}
+                row['patient_info'] = {k: v for k, v in data.items() if k.lower() in self.PATIENT_INFO_KEYS}
+                row['clinical_data'] = {k: v for k, v in data.items() if k.lower() not in self.PATIENT_INFO_KEYS}
+                yield row
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
     def get_template_fields(self):
         """Return template fields as Python list"""
         if self.template_fields_json:
             return json.loads(self.template_fields_json)
         return []
 
+    REPORT_ATTACHMENT_PREFIX = 'Rapport_Medical_'
+
+    def get_report_attachment_name(self):
+        """Name of the cached QWeb PDF, derived from the data the report prints"""
+        self.ensure_one()
+        content_hash = hashlib.sha1(json.dumps([
+            self.name,
+            fields.Datetime.to_string(self.create_date),
+            self.extracted_data_json,
+            self.validated_data_json,
+        ]).encode()).hexdigest()[:16]
+        return f'{self.REPORT_ATTACHMENT_PREFIX}{self.name}_{content_hash}.pdf'.replace('/', '_')
+
+    def _get_report_attachments(self):
+        """Return ``{record id: ir.attachment}`` of the cached PDF reports, rendering missing ones"""
+        report = self.env.ref('medical_transcription.action_report_medical_transcription')
+        missing = self.filtered(lambda record: not report.retrieve_attachment(record))
+        if missing:
+            _logger.info(f"Rendering {len(missing)} PDF report(s)")
+        for record in missing:
+            # One record per render: Odoo attaches the PDF to that record id
+            report._render_qweb_pdf(report.report_name, record.ids)
+
+        attachments = {record.id: report.retrieve_attachment(record) for record in self}
+        self.env['ir.attachment'].search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', self.ids),
+            ('res_field', '=', False),
+            ('name', '=like', f'{self.REPORT_ATTACHMENT_PREFIX}%'),
+            ('id', 'not in', [attachment.id for attachment in attachments.values() if attachment]),
+        ]).unlink()
+        return attachments
+
+    def _check_validated_data(self, validated_data, validated_report=''):
+        """Check reviewed data against the template; returns ``[{key, label, message}]``"""
+        self.ensure_one()
+        try:
+            errors = template_validator.get_validator(self.template_fields_json).validate(validated_data)
+        except Exception as e:
+            # A malformed template must not abort a whole batch
+            _logger.warning(f"Could not check the data of {self.name}: {e}")
+            errors = [{'key': None, 'label': None, 'message': f'Could not check the data: {e}'}]
+        if not isinstance(validated_report, str):
+            errors.append({'key': None, 'label': None, 'message': 'The medical report must be text'})
+        return errors
+
+    def _validate_batch(self, entries=None):
+        """Validate several transcriptions; ``entries`` maps ids to ``(validated_data, validated_report)``.
+
+        Returns ``{record id: API result or error}``.
+        """
+        entries = entries or {}
+        api = self.env['medical.transcription.api']
+        timing = self.env['medical.transcription.timing']
+        outcomes, pending = {}, []
+        for record in self:
+            if record.state not in ('review', 'validated') or not (
+                    record.api_transcription_id or record.cached_source_id):
+                outcomes[record.id] = {'success': False, 'error': f'{record.name} is not ready for validation'}
+                continue
+            data, report = entries.get(record.id, (None, None))
+            data = record.get_extracted_data() if data is None else data
+            report = (record.medical_report or '') if report is None else report
+            errors = record._check_validated_data(data, report)
+            if errors:
+                outcomes[record.id] = {
+                    'success': False,
+                    'error': f'Invalid data: {template_validator.format_errors(errors)}',
+                    'field_errors': errors,
+                }
+                continue
+            if not record.api_transcription_id:
+                record._validate_locally(data, report)
+                outcomes[record.id] = {'success': True, 'local': True}
+                continue
+            pending.append((record, data, report))
+
+        calls = [('POST', '/api/medical/validate', record._get_api_backend(), {'json': {
+            'transcription_id': record.api_transcription_id,
+            'validated_report': report,
+            'validated_data': data,
+        }}) for record, data, report in pending]
+        with timing._timed('validate_bulk.api_calls'):
+            results = api._request_json_many(calls, timeout=60) if calls else []
+
+        validated, artifacts = self.browse(), []
+        with timing._timed('validate_bulk.write'):
+            for (record, data, report), result in zip(pending, results):
+                if isinstance(result, Exception):
+                    _logger.error(f"Error validating transcription {record.id}: {result}")
+                    outcomes[record.id] = {'success': False, 'error': api._format_error(result)}
+                    continue
+                outcomes[record.id] = result
+                if not result.get('success'):
+                    continue
+                record.write({
+                    'validated_data_json': json.dumps(data, ensure_ascii=False),
+                    'medical_report': report,
+                })
+                validated |= record
+                artifacts.append((record, [(result.get('files', {}).get('validated_pdf'), 'pdf')]))
+            validated.write({'state': 'validated'})
+            self.env['medical.transcription.job']._enqueue_artifacts_batch(
+                [record for record, _files in artifacts],
+                [files for _record, files in artifacts],
+            )
+        return outcomes
+
+    def _validate_locally(self, validated_data, validated_report):
+        """Validate a record answered from a cached result, without the API"""
+        self.ensure_one()
+        self.write({
+            'validated_data_json': json.dumps(validated_data, ensure_ascii=False),
+            'medical_report': validated_report,
+            'state': 'validated',
+        })
+
+    def action_validate(self):
+        """Validate the selected transcriptions as they are (list action)"""
+        outcomes = self._validate_batch()
+        failed = [outcome.get('error') for outcome in outcomes.values() if not outcome.get('success')]
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Validation'),
+                'message': _('%s transcription(s) validated, %s failed.', len(outcomes) - len(failed), len(failed))
+                           + ('\n' + '\n'.join(filter(None, failed[:5])) if failed else ''),
+                'type': 'warning' if failed else 'success',
+                'sticky': bool(failed),
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    def action_download_audio(self):
+        """Download the recording, restoring it first if it was archived"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/medical_transcription/audio/{self.id}',
+            'target': 'self',
+        }
+
+    def action_download_reports(self):
+        """Download the PDF reports of the selected records as a ZIP file"""
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/medical_transcription/reports?ids={",".join(map(str, self.ids))}',
+            'target': 'self',
+        }
+
+    def _get_lookup_payload(self):
+        """Build a ``/api/medical/transcription/<id>`` shaped payload from local data"""
+        self.ensure_one()
+        data = self.get_extracted_data()
+        patient_info = self.get_patient_info()
+        requested_keys = {
+            field.get('key') if isinstance(field, dict) else field
+            for field in self.get_template_fields()
+        }
+        files = {}
+        if self.pdf_filename:
+            files['pdf'] = f'/medical_transcription/download/{self.id}/pdf'
+        if self.json_filename:
+            files['json'] = f'/medical_transcription/download/{self.id}/json'
+        return {
+            'success': True,
+            'source': 'local',
+            'transcription_id': self.api_transcription_id,
+            'transcription_type': self.template_type,
+            'created_at': self.create_date.timestamp() if self.create_date else None,
+            'updated_at': self.write_date.timestamp() if self.write_date else None,
+            'validated': self.state == 'validated',
+            'validated_data': json.loads(self.validated_data_json) if self.validated_data_json else {},
+            'whisper_transcription': self.whisper_transcription,
+            'cleaned_text': self.cleaned_text,
+            'medical_report': self.medical_report,
+            'patient_info': patient_info,
+            'requested_fields': {k: v for k, v in data.items()
+                                 if k in requested_keys and k not in patient_info},
+            'additional_fields': {k: v for k, v in data.items()
+                                  if k not in requested_keys and k not in patient_info},
+            'files': files,
+            'metadata': {
+                'odoo_reference': self.name,
+                'template_name': self.template_name,
+                'state': self.state,
+            },
+        }
+
     def set_extracted_data(self, data):
         """Store extracted data as JSON"""
         self.extracted_data_json = json.dumps(data, ensure_ascii=False)
@@ -167,3 +666,560 @@ class MedicalTranscription(models.Model):
     def set_template_fields(self, fields):
         """Store template fields as JSON"""
         self.template_fields_json = json.dumps(fields, ensure_ascii=False)
+
+    @api.model
+    def _prepare_api_fields(self, template_fields):
+        """Convert template fields to the format expected by Flask API"""
+        fields_for_api = []
+        for field in template_fields or []:
+            if isinstance(field, dict):
+                fields_for_api.append({
+                    'key': field.get('key', ''),
+                    'label': field.get('label', field.get('key', ''))
+                })
+            elif isinstance(field, str):
+                fields_for_api.append(field)
+        return fields_for_api
+
+    def _get_field_attachment(self, field_name):
+        """Return the ir.attachment holding a binary attachment field"""
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', self.id),
+        ], limit=1)
+
+    @contextlib.contextmanager
+    def _open_binary_field(self, field_name):
+        """Open a binary attachment field as a file object.
+
+        Yields ``(fileobj, size)``; filestore attachments are read from disk
+        instead of being decoded in memory.
+        """
+        attachment = self._get_field_attachment(field_name)
+        if attachment.store_fname:
+            with open(attachment._full_path(attachment.store_fname), 'rb') as fileobj:
+                yield fileobj, attachment.file_size
+        else:
+            raw = attachment.raw or b''
+            yield io.BytesIO(raw), len(raw)
+
+    def _store_binary_from_file(self, field_name, fileobj, mimetype=None):
+        """Store a file object into a binary attachment field.
+
+        The content is hashed and copied into the filestore in chunks so the
+        peak memory does not depend on the file size. Returns the size.
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        fileobj.seek(0)
+        if Attachment._storage() != 'file':
+            # Database storage needs the whole value anyway
+            data = fileobj.read()
+            self.write({field_name: base64.b64encode(data)})
+            return len(data)
+
+        sha = hashlib.sha1()
+        size = 0
+        head = b''
+        for chunk in iter(lambda: fileobj.read(STREAM_CHUNK_SIZE), b''):
+            if not head:
+                head = chunk[:1024]
+            sha.update(chunk)
+            size += len(chunk)
+        checksum = sha.hexdigest()
+
+        store_fname = f'{checksum[:2]}/{checksum}'
+        full_path = Attachment._full_path(store_fname)
+        if not os.path.isfile(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            fileobj.seek(0)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path))
+            with os.fdopen(fd, 'wb') as dest:
+                shutil.copyfileobj(fileobj, dest, STREAM_CHUNK_SIZE)
+            os.replace(tmp_path, full_path)
+            # Like ir.attachment._file_write: collected if the transaction aborts
+            Attachment._mark_for_gc(store_fname)
+
+        self._attach_stored_file(field_name, store_fname, checksum, size, mimetype or guess_mimetype(head))
+        if field_name == 'audio_file' and self.audio_storage != 'hot':
+            self.write({'audio_storage': 'hot', 'audio_cold_file': False})
+        return size
+
+    def _attach_stored_file(self, field_name, store_fname, checksum, file_size, mimetype):
+        """Make a filestore file the content of a binary attachment field.
+
+        ``ir.attachment.create`` and ``write`` drop ``store_fname``,
+        ``checksum`` and ``file_size`` (they are derived from the data), so
+        the attachment is created empty and pointed to the file in SQL.
+        """
+        self.ensure_one()
+        self._get_field_attachment(field_name).unlink()
+        attachment = self.env['ir.attachment'].sudo().create({
+            'name': field_name,
+            'res_model': self._name,
+            'res_field': field_name,
+            'res_id': self.id,
+            'type': 'binary',
+            'mimetype': mimetype,
+        })
+        self.env.cr.execute("""
+            UPDATE ir_attachment
+               SET store_fname = %s, checksum = %s, file_size = %s, mimetype = %s
+             WHERE id = %s
+        """, [store_fname, checksum, file_size, mimetype, attachment.id])
+        attachment.invalidate_recordset(['store_fname', 'checksum', 'file_size', 'mimetype', 'raw', 'datas'])
+        self.invalidate_recordset([field_name])
+        return attachment
+
+    def _notify_progress(self, stage, partner=None, **values):
+        """Push a progress event on the bus channel of ``partner`` (default: current user).
+
+        Stages: ``uploaded``, ``accepted``, ``transcribed``, ``extracted``,
+        ``artifacts_stored`` and ``failed``.
+        """
+        self.ensure_one()
+        self.env['bus.bus']._sendone(
+            partner or self.env.user.partner_id,
+            'medical_transcription/progress',
+            dict(values, transcription_id=self.id, name=self.name, state=self.state, stage=stage),
+        )
+
+    def _get_chunk_dir(self):
+        """Directory spooling the audio chunks uploaded while recording"""
+        self.ensure_one()
+        return os.path.join(
+            config['data_dir'], 'medical_transcription_chunks', self.env.cr.dbname, str(self.id))
+
+    def _store_audio_chunk(self, index, stream):
+        """Spool chunk ``index`` of the recording; chunk 0 starts a new recording.
+
+        Chunks are written atomically under their index, so re-sending a
+        chunk after a network error is harmless. Returns the chunk size.
+        """
+        chunk_dir = self._get_chunk_dir()
+        if index == 0:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+        os.makedirs(chunk_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=chunk_dir, prefix='.')
+        with os.fdopen(fd, 'wb') as dest:
+            shutil.copyfileobj(stream, dest, STREAM_CHUNK_SIZE)
+            size = dest.tell()
+        os.replace(tmp_path, os.path.join(chunk_dir, f'{index:06d}'))
+        return size
+
+    def _get_next_chunk_index(self):
+        """Index of the first chunk not received yet, to resume an upload"""
+        chunk_dir = self._get_chunk_dir()
+        index = 0
+        while os.path.isfile(os.path.join(chunk_dir, f'{index:06d}')):
+            index += 1
+        return index
+
+    def _assemble_audio_chunks(self, chunk_count, mimetype=None):
+        """Join the ``chunk_count`` spooled chunks into the audio field.
+
+        Returns the audio size. Raises ``ValidationError`` if chunks are missing.
+        """
+        next_index = self._get_next_chunk_index()
+        if next_index < chunk_count:
+            raise ValidationError(_('Audio chunk %s is missing.', next_index))
+        chunk_dir = self._get_chunk_dir()
+        with tempfile.TemporaryFile() as spool:
+            for index in range(chunk_count):
+                with open(os.path.join(chunk_dir, f'{index:06d}'), 'rb') as chunk:
+                    shutil.copyfileobj(chunk, spool, STREAM_CHUNK_SIZE)
+            size = self._store_binary_from_file('audio_file', spool, mimetype=mimetype)
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        return size
+
+    @api.model
+    def _cron_clean_audio_chunks(self, max_age_days=2):
+        """Remove recordings that were never transcribed, and their chunks.
+
+        A record is created in the ``recording`` state when recording starts;
+        it is left behind if the recording is abandoned.
+        """
+        abandoned = self.search([
+            ('state', '=', 'recording'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=max_age_days)),
+        ])
+        if abandoned:
+            _logger.info(f"Removing {len(abandoned)} abandoned recording(s)")
+            abandoned.unlink()
+        root = os.path.join(config['data_dir'], 'medical_transcription_chunks', self.env.cr.dbname)
+        if not os.path.isdir(root):
+            return
+        limit = time.time() - max_age_days * 86400
+        for name in os.listdir(root):
+            chunk_dir = os.path.join(root, name)
+            if os.path.getmtime(chunk_dir) < limit:
+                _logger.info(f"Removing abandoned audio chunks of transcription {name}")
+                shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    def _get_audio_retention_dir(self, tier):
+        """Directory of the ``cold`` (archived) or ``warm`` (restored) recordings.
+
+        Cold storage defaults to the data directory and can be moved, e.g. to
+        cheaper storage, with ``medical_transcription.cold_storage_path``.
+        """
+        root = config['data_dir']
+        if tier == 'cold':
+            root = self.env['ir.config_parameter'].sudo().get_param(
+                'medical_transcription.cold_storage_path') or root
+        return os.path.join(root, f'medical_transcription_{tier}', self.env.cr.dbname)
+
+    @contextlib.contextmanager
+    def _open_audio(self):
+        """Open the recording wherever it is stored; yields ``(fileobj, size)``"""
+        self.ensure_one()
+        if self.audio_storage == 'cold':
+            with self._open_cold_audio() as fileobj:
+                yield fileobj, os.fstat(fileobj.fileno()).st_size
+        else:
+            with self._open_binary_field('audio_file') as (fileobj, size):
+                yield fileobj, size
+
+    def _get_audio_download_info(self):
+        """Filename and mimetype of the recording as it is currently stored"""
+        self.ensure_one()
+        filename = self.audio_filename or f'{self.name}.wav'
+        if self.audio_storage == 'cold':
+            extension = os.path.splitext(self.audio_cold_file)[1]
+            filename = os.path.splitext(filename)[0] + extension
+            return filename, mimetypes.guess_type(self.audio_cold_file)[0] or 'application/octet-stream'
+        return filename, self._get_field_attachment('audio_file').mimetype or 'application/octet-stream'
+
+    def _open_cold_audio(self):
+        """Open an archived recording, restoring it into the warm cache first.
+
+        The warm cache keeps the recently opened recordings up to
+        ``medical_transcription.audio_warm_cache_mb`` (least recently used
+        files are evicted). Returns a file object the caller must close.
+        """
+        self.ensure_one()
+        warm_dir = self._get_audio_retention_dir('warm')
+        warm_path = os.path.join(warm_dir, self.audio_cold_file)
+        try:
+            fileobj = open(warm_path, 'rb')
+        except FileNotFoundError:
+            pass
+        else:
+            # Mark as most recently used
+            with contextlib.suppress(OSError):
+                os.utime(warm_path)
+            return fileobj
+
+        cold_path = os.path.join(self._get_audio_retention_dir('cold'), self.audio_cold_file)
+        if not os.path.isfile(cold_path):
+            raise ValidationError(_('The archived recording of %s is missing (%s).', self.name, cold_path))
+        os.makedirs(warm_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=warm_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as dest, open(cold_path, 'rb') as source:
+            shutil.copyfileobj(source, dest, STREAM_CHUNK_SIZE)
+        os.replace(tmp_path, warm_path)
+        _logger.info(f"Restored archived recording of {self.name} into the warm cache")
+        # Opened before the eviction, which may remove it under a small limit
+        fileobj = open(warm_path, 'rb')
+        max_size = self.env['medical.transcription.api']._get_int_param(
+            'medical_transcription.audio_warm_cache_mb', 1024) * 1024 * 1024
+        _evict_least_recently_used(warm_dir, max_size)
+        return fileobj
+
+    def _archive_audio(self, audio_format):
+        """Move the recording to cold storage, recompressed as ``audio_format``.
+
+        Without ``audio_format`` (or ffmpeg) the file is moved as is; the
+        recompressed file is only kept if smaller. Returns the size of the
+        archived file.
+        """
+        self.ensure_one()
+        attachment = self._get_field_attachment('audio_file')
+        cold_dir = self._get_audio_retention_dir('cold')
+        os.makedirs(cold_dir, exist_ok=True)
+        with self._open_binary_field('audio_file') as (audio, size):
+            extension = (os.path.splitext(self.audio_filename or '')[1]
+                         or mimetypes.guess_extension(attachment.mimetype or '') or '.bin')
+            source = audio
+            if audio_format and audio_tools.FFMPEG:
+                spool, spool_size = audio_tools.normalize_speech(audio, audio_format)
+                if spool_size < size:
+                    source, size = spool, spool_size
+                    extension = f'.{audio_tools.SPEECH_FORMATS[audio_format][1]}'
+                else:
+                    spool.close()
+                    audio.seek(0)
+            filename = f'{self.id}_{(attachment.checksum or "")[:12]}{extension}'
+            fd, tmp_path = tempfile.mkstemp(dir=cold_dir, suffix='.tmp')
+            with source, os.fdopen(fd, 'wb') as dest:
+                shutil.copyfileobj(source, dest, STREAM_CHUNK_SIZE)
+                dest.flush()
+                os.fsync(dest.fileno())
+            os.replace(tmp_path, os.path.join(cold_dir, filename))
+        # Removing the attachment lets the filestore garbage collector free it
+        self.write({'audio_file': False, 'audio_storage': 'cold', 'audio_cold_file': filename})
+        return size
+
+    @api.model
+    def _cron_archive_audio(self, limit=500):
+        """Move the recordings of old validated transcriptions to cold storage.
+
+        Recordings of transcriptions validated and created more than
+        ``medical_transcription.audio_cold_after_days`` days ago (0 disables
+        the archival) are recompressed as
+        ``medical_transcription.cold_audio_format`` (default ``opus``, empty
+        to keep the original encoding) and removed from the filestore.
+        """
+        api_client = self.env['medical.transcription.api']
+        days = api_client._get_int_param('medical_transcription.audio_cold_after_days', 0)
+        if days <= 0:
+            return
+        audio_format = self.env['ir.config_parameter'].sudo().get_param(
+            'medical_transcription.cold_audio_format', 'opus')
+        if audio_format not in audio_tools.SPEECH_FORMATS:
+            audio_format = ''
+        records = self.search([
+            ('state', '=', 'validated'),
+            ('audio_storage', '=', 'hot'),
+            ('audio_file', '!=', False),
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=days)),
+        ], order='id', limit=limit)
+        stored = archived = 0
+        for record in records:
+            size = record._get_field_attachment('audio_file').file_size
+            try:
+                with self.env.cr.savepoint():
+                    archived += record._archive_audio(audio_format)
+            except Exception as e:
+                _logger.warning(f"Could not archive the recording of {record.name}: {e}")
+                continue
+            stored += size
+            self.env.cr.commit()
+        if records:
+            _logger.info(f"Archived {len(records)} recording(s): {stored} bytes moved out of the "
+                         f"filestore, {archived} bytes in cold storage")
+        self._clean_cold_audio()
+
+    @api.model
+    def _clean_cold_audio(self, min_age_days=1):
+        """Remove archived files no longer referenced (recording replaced or record deleted)"""
+        cold_dir = self._get_audio_retention_dir('cold')
+        if not os.path.isdir(cold_dir):
+            return
+        limit = time.time() - min_age_days * 86400
+        names = [name for name in os.listdir(cold_dir)
+                 if os.path.getmtime(os.path.join(cold_dir, name)) < limit]
+        if not names:
+            return
+        self.env.cr.execute(
+            f"SELECT audio_cold_file FROM {self._table} WHERE audio_cold_file = ANY(%s)", [names])
+        referenced = {row[0] for row in self.env.cr.fetchall()}
+        for name in set(names) - referenced:
+            _logger.info(f"Removing unreferenced archived recording {name}")
+            with contextlib.suppress(OSError):
+                os.unlink(os.path.join(cold_dir, name))
+
+    def _get_transcribe_form_data(self, params):
+        """Form fields sent with the audio to ``/api/medical/transcribe``"""
+        self.ensure_one()
+        fields_for_api = self._prepare_api_fields(params.get('template_fields'))
+        return {
+            'fields': json.dumps(fields_for_api) if fields_for_api else '[]',
+            'allow_additional': 'true',
+            'input_language': params.get('input_language', 'fr'),
+            'output_language': params.get('output_language', 'fr'),
+        }
+
+    def _get_api_backend(self):
+        """URL of the API backend holding this transcription.
+
+        Transcriptions made before backends were recorded live on the
+        main API URL.
+        """
+        self.ensure_one()
+        return self.api_backend_url or self.env['medical.transcription.api']._get_api_url().rstrip('/')
+
+    def _apply_api_result(self, result, api_url=None):
+        """Write a successful Flask API result on the transcription.
+
+        ``api_url`` is the backend that produced it.
+        """
+        self.ensure_one()
+        # Combine all extracted data
+        extracted_data = result.get('extracted_data', {})
+        # Also include requested_fields and additional_fields if present
+        if result.get('requested_fields'):
+            extracted_data.update(result.get('requested_fields', {}))
+        if result.get('additional_fields'):
+            extracted_data.update(result.get('additional_fields', {}))
+
+        self.write({
+            'api_transcription_id': result.get('transcription_id'),
+            'api_backend_url': api_url or False,
+            'whisper_transcription': result.get('whisper_transcription') or result.get('full_text', ''),
+            'cleaned_text': result.get('cleaned_text', ''),
+            'medical_report': result.get('medical_report', ''),
+            'extracted_data_json': json.dumps(
+                extracted_data,
+                ensure_ascii=False
+            ),
+            'state': 'review',
+            'error_message': False,
+        })
+
+    def _get_request_hash(self, params):
+        """Hash identifying a transcription request: audio content + settings.
+
+        The audio is identified by the checksum ``ir.attachment`` already
+        computed when it was stored, so the file is not read again.
+        """
+        self.ensure_one()
+        audio_checksum = self._get_field_attachment('audio_file').checksum
+        if not audio_checksum:
+            return False
+        key = json.dumps([
+            audio_checksum,
+            params.get('template_type') or '',
+            self._prepare_api_fields(params.get('template_fields')),
+            params.get('input_language', 'fr'),
+            params.get('output_language', 'fr'),
+        ], ensure_ascii=False)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @api.model
+    def _find_cached_result(self, request_hash):
+        """Return the latest successful transcription of an identical request"""
+        ttl_days = self.env['medical.transcription.api']._get_int_param(
+            'medical_transcription.dedup_ttl_days', 30)
+        if not request_hash or ttl_days <= 0:
+            return self.browse()
+        return self.search([
+            ('request_hash', '=', request_hash),
+            ('state', 'in', ('review', 'validated')),
+            ('create_date', '>=', fields.Datetime.now() - timedelta(days=ttl_days)),
+        ], order='id desc', limit=1)
+
+    def _apply_cached_result(self, source):
+        """Copy the transcription result of ``source`` (same request) on this record.
+
+        Returns the result in the format of the Flask API response. Files are
+        copied by reference to the same filestore content; they are only
+        taken from sources still in review, as validation replaces the PDF.
+        The API transcription stays the source's: this record gets no API ID
+        and is validated locally (see ``_validate_batch``).
+        """
+        self.ensure_one()
+        extracted_data = json.loads(source.extracted_data_json or '{}')
+        self.write({
+            'api_transcription_id': False,
+            'api_backend_url': False,
+            'cached_source_id': source.id,
+            'whisper_transcription': source.whisper_transcription,
+            'cleaned_text': source.cleaned_text,
+            'medical_report': source.medical_report,
+            'extracted_data_json': source.extracted_data_json,
+            'state': 'review',
+            'error_message': False,
+        })
+        if source.state == 'review':
+            for field_name, filename_field, _mimetype in self.ARTIFACT_FIELDS.values():
+                if source[filename_field]:
+                    self._copy_binary_field(source, field_name)
+                    self.write({filename_field: source[filename_field]})
+        _logger.info(f"Transcription {self.name} answered from the result of {source.name}")
+        return {
+            'success': True,
+            'cached': True,
+            'transcription_id': False,
+            'whisper_transcription': source.whisper_transcription or '',
+            'cleaned_text': source.cleaned_text or '',
+            'medical_report': source.medical_report or '',
+            'extracted_data': extracted_data,
+        }
+
+    def _copy_binary_field(self, source, field_name):
+        """Point a binary attachment field to the content of ``source``'s"""
+        self.ensure_one()
+        attachment = source._get_field_attachment(field_name)
+        if not attachment.store_fname:
+            self.write({field_name: source[field_name]})
+            return
+        self._attach_stored_file(
+            field_name, attachment.store_fname, attachment.checksum, attachment.file_size, attachment.mimetype)
+
+    @api.model
+    def _cron_evict_result_cache(self):
+        """Evict expired or surplus entries from the transcription result cache"""
+        api_client = self.env['medical.transcription.api']
+        ttl_days = api_client._get_int_param('medical_transcription.dedup_ttl_days', 30)
+        max_entries = api_client._get_int_param('medical_transcription.dedup_max_entries', 10000)
+        expired = self.search([
+            ('request_hash', '!=', False),
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=max(ttl_days, 0))),
+        ])
+        surplus = self.search([
+            ('request_hash', '!=', False),
+            ('id', 'not in', expired.ids),
+        ], order='id desc', offset=max(max_entries, 0))
+        evicted = expired | surplus
+        if evicted:
+            _logger.info(f"Evicting {len(evicted)} entries from the transcription result cache")
+            evicted.write({'request_hash': False})
+
+    # Binary field and filename field receiving each type of API artifact
+    ARTIFACT_FIELDS = {
+        'pdf': ('pdf_file', 'pdf_filename', 'application/pdf'),
+        'json': ('json_file', 'json_filename', 'application/json'),
+    }
+
+    def _download_and_store_files(self, files):
+        """Download files from Flask API and store them in Odoo.
+
+        ``files`` is a list of ``(file_path, file_type)``. Downloads run
+        concurrently and are streamed into the filestore.
+        """
+        self.ensure_one()
+        files = [(path, file_type) for path, file_type in files
+                 if path and file_type in self.ARTIFACT_FIELDS]
+        if not files:
+            return True
+        log_level = self.env['medical.transcription.api']._get_log_level()
+        _logger.log(log_level, f"Downloading {len(files)} file(s) for {self.name}")
+        downloads = self.env['medical.transcription.api']._download_files(
+            [path for path, _type in files], api_url=self._get_api_backend())
+
+        success = True
+        for file_path, file_type in files:
+            content = downloads.get(file_path)
+            if isinstance(content, Exception) or content is None:
+                _logger.warning(f"Failed to download file {file_path}: {content}")
+                success = False
+                continue
+            field_name, filename_field, mimetype = self.ARTIFACT_FIELDS[file_type]
+            filename = file_path.split('/')[-1]
+            with content:
+                self._store_binary_from_file(field_name, content, mimetype=mimetype)
+            self.write({filename_field: filename})
+            _logger.log(log_level, f"File {filename} stored successfully")
+        return success
+
+    def _download_and_store_file(self, file_path, file_type):
+        """Download file from Flask API and store in Odoo"""
+        return self._download_and_store_files([(file_path, file_type)])
+
+
+def _evict_least_recently_used(directory, max_size):
+    """Delete the least recently used files of ``directory`` above ``max_size`` bytes"""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+            total -= size
@@ -0,0 +1,700 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import json
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+from . import audio_tools
+
+_logger = logging.getLogger(__name__)
+
+# Answers of an API without segment transcription (transcribe_only) or
+# /api/medical/extract
+UNSUPPORTED_STATUSES = (400, 404, 405, 422)
+# Whether every API backend serves /api/medical/extract ('1' or '0'), probed
+# once; cleared when the segmentation setting changes
+SEGMENTATION_SUPPORTED_PARAM = 'medical_transcription.segmentation_supported'
+
+
+def _normalize_audio(call):
+    """Re-encode the audio of a call as 16 kHz mono ``call['audio_format']``.
+
+    Runs in a worker thread. Returns ``(fileobj, size)``, or ``None`` to
+    send the original file (failure, or nothing saved).
+    """
+    start = time.perf_counter()
+    try:
+        spool, size = audio_tools.normalize_speech(call['audio'], call['audio_format'])
+    except Exception as e:
+        _logger.warning(f"Could not normalize audio of {call['name']}, sending it as is: {e}")
+        call['audio'].seek(0)
+        return None
+    finally:
+        call['normalize_duration'] = time.perf_counter() - start
+    if size >= call['size']:
+        spool.close()
+        call['audio'].seek(0)
+        return None
+    _logger.log(call['log_level'], f"Normalized audio of {call['name']}: {call['size']} -> {size} bytes")
+    return spool, size
+
+
+def _dispatch_transcription(endpoint, call, timeout):
+    """POST one audio file to the Flask API; runs in a worker thread.
+
+    The audio is normalized first when ``call['audio_format']`` is set.
+    Must not touch the ORM. Returns the JSON result or the exception.
+    """
+    audio, size, filename = call['audio'], call['size'], call['filename']
+    normalized = _normalize_audio(call) if call.get('audio_format') else None
+    if normalized:
+        audio, size = normalized
+        filename = f"{os.path.splitext(filename)[0]}.{audio_tools.SPEECH_FORMATS[call['audio_format']][1]}"
+    call['sent_size'] = size
+    start = time.perf_counter()
+    try:
+        response = endpoint.post_file(
+            '/api/medical/transcribe',
+            audio,
+            size,
+            filename,
+            call['data'],
+            timeout=timeout,
+        )
+        _logger.log(call['log_level'], f"Flask API response status for {call['name']}: {response.status_code}")
+        call['api_url'] = response.api_url
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        return e
+    finally:
+        call['duration'] = time.perf_counter() - start
+        if normalized:
+            audio.close()
+
+
+def _dispatch_extraction(endpoint, call, timeout):
+    """POST stitched segment transcriptions for extraction; runs in a worker thread.
+
+    Must not touch the ORM. Returns the JSON result or the exception.
+    """
+    start = time.perf_counter()
+    try:
+        response = endpoint.request(
+            'POST',
+            '/api/medical/extract',
+            timeout=timeout,
+            json=call['payload'],
+        )
+        _logger.log(call['log_level'], f"Flask API extraction status for {call['name']}: {response.status_code}")
+        call['api_url'] = response.api_url
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        return e
+    finally:
+        call['duration'] = time.perf_counter() - start
+
+
+def _is_unsupported(result, segment=False):
+    """Whether a segment or extraction result shows the API lacks that contract.
+
+    Calls rejected with ``UNSUPPORTED_STATUSES`` and answers that are not
+    API results count; a segment answered with a medical report means
+    ``transcribe_only`` was ignored.
+    """
+    if isinstance(result, Exception):
+        response = getattr(result, 'response', None)
+        if response is not None:
+            return response.status_code in UNSUPPORTED_STATUSES
+        # Not JSON
+        return isinstance(result, ValueError)
+    if not isinstance(result, dict) or 'success' not in result:
+        return True
+    return segment and bool(result.get('medical_report'))
+
+
+def _stitch_segments(results):
+    """Join the transcriptions of consecutive segments, or return the first error"""
+    texts = []
+    for result in results:
+        if isinstance(result, Exception):
+            return result
+        if not result.get('success'):
+            return result
+        texts.append((result.get('whisper_transcription') or result.get('full_text') or '').strip())
+    return '\n'.join(text for text in texts if text)
+
+
+class MedicalTranscriptionJob(models.Model):
+    _name = 'medical.transcription.job'
+    _description = 'Medical Transcription Job'
+    _order = 'id desc'
+
+    MAX_ATTEMPTS = 3
+    # Delay before the first retry of a failed job, doubled at each attempt
+    RETRY_DELAY = 60
+
+    transcription_id = fields.Many2one(
+        'medical.transcription',
+        string='Transcription',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    user_id = fields.Many2one(
+        'res.users',
+        string='Requested By',
+        default=lambda self: self.env.user,
+        required=True,
+    )
+    job_type = fields.Selection([
+        ('transcribe', 'Transcription'),
+        ('artifacts', 'File Downloads'),
+    ], string='Type', default='transcribe', required=True)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', default='queued', required=True, index=True)
+
+    # Request parameters and API result stored as JSON
+    params_json = fields.Text(string='Parameters (JSON)')
+    result_json = fields.Text(string='Result (JSON)')
+    error_message = fields.Text(string='Error Message')
+
+    attempts = fields.Integer(string='Attempts', default=0)
+    # Queued jobs are not picked up before this date (retry backoff)
+    date_next_attempt = fields.Datetime(string='Next Attempt')
+    # Audio stored and audio actually sent to the API (after normalization
+    # or segmentation), in bytes
+    audio_size = fields.Integer(string='Audio Size')
+    audio_sent_size = fields.Integer(string='Audio Sent')
+    date_started = fields.Datetime(string='Started On')
+    date_done = fields.Datetime(string='Finished On')
+
+    @api.model
+    def _enqueue(self, transcription, params, job_type='transcribe'):
+        """Create a queued job for ``transcription`` and wake up the job runner"""
+        return self._enqueue_batch(transcription, [params], job_type=job_type)
+
+    @api.model
+    def _enqueue_batch(self, transcriptions, params_list, job_type='transcribe'):
+        """Create one queued job per transcription in a single ``create``.
+
+        Transcriptions identical to a recent one (same audio and settings)
+        are answered from its result: their job is created already done.
+        """
+        vals_list = []
+        for transcription, params in zip(transcriptions, params_list):
+            vals = {
+                'transcription_id': transcription.id,
+                'job_type': job_type,
+                'params_json': json.dumps(params, ensure_ascii=False),
+            }
+            if job_type == 'transcribe':
+                vals.update(self._get_cached_result_vals(transcription, params))
+            vals_list.append(vals)
+        jobs = self.create(vals_list)
+        if any(job.state == 'queued' for job in jobs):
+            self._trigger_processing()
+        return jobs
+
+    @api.model
+    def _get_cached_result_vals(self, transcription, params):
+        """Job values answering ``transcription`` from the result cache, if possible.
+
+        On a cache miss, the request hash is stored on the transcription so
+        that its result can serve later identical requests.
+        """
+        request_hash = transcription._get_request_hash(params)
+        source = transcription._find_cached_result(request_hash)
+        if not source:
+            transcription.request_hash = request_hash
+            return {}
+        result = transcription._apply_cached_result(source)
+        result['template'] = {
+            'fields': params.get('template_fields') or []
+        }
+        return {
+            'state': 'done',
+            'date_started': fields.Datetime.now(),
+            'date_done': fields.Datetime.now(),
+            'result_json': json.dumps(result, ensure_ascii=False),
+        }
+
+    @api.model
+    def _trigger_processing(self, at=None):
+        """Ask the cron worker to process queued jobs as soon as possible (or at ``at``)"""
+        self.env.ref('medical_transcription.ir_cron_process_transcription_jobs').sudo()._trigger(at=at)
+
+    def _notify_progress(self, stage):
+        """Push a progress event to the user who requested the job"""
+        for job in self:
+            job.transcription_id._notify_progress(
+                stage,
+                partner=job.user_id.partner_id,
+                job_id=job.id,
+                job_type=job.job_type,
+                job_state=job.state,
+            )
+
+    def _get_status(self):
+        """Return the polling payload for the frontend"""
+        self.ensure_one()
+        status = {
+            'success': True,
+            'job_id': self.id,
+            'transcription_id': self.transcription_id.id,
+            'state': self.state,
+        }
+        if self.state == 'done':
+            status['result'] = json.loads(self.result_json or '{}')
+        elif self.state == 'failed':
+            status['error'] = self.error_message or 'Transcription failed (unknown reason)'
+        return status
+
+    @api.model
+    def _cron_process_jobs(self, limit=20):
+        """Process queued jobs by batches, committing after each batch.
+
+        Up to ``medical_transcription.max_concurrency`` transcriptions of a
+        batch are sent to the Flask API at the same time.
+        """
+        self._requeue_stale_jobs()
+        concurrency = max(1, self.env['medical.transcription.api']._get_int_param(
+            'medical_transcription.max_concurrency', 4))
+        for _i in range(limit):
+            jobs = self._acquire_next_jobs(concurrency)
+            if not jobs:
+                return
+            jobs.filtered(lambda job: job.job_type == 'transcribe')._run_transcriptions()
+            for job in jobs.filtered(lambda job: job.job_type == 'artifacts'):
+                job._run_artifacts()
+            self.env.cr.commit()
+        # More work left: schedule another run instead of hogging the cron thread
+        if self.search_count(self._get_ready_domain()):
+            self._trigger_processing()
+
+    @api.model
+    def _get_ready_domain(self):
+        """Domain of the queued jobs whose retry delay has elapsed"""
+        return [
+            ('state', '=', 'queued'),
+            '|', ('date_next_attempt', '=', False), ('date_next_attempt', '<=', fields.Datetime.now()),
+        ]
+
+    @api.model
+    def _acquire_next_jobs(self, limit=1):
+        """Lock the oldest queued jobs and mark them as running"""
+        self.env.cr.execute("""
+            SELECT id FROM medical_transcription_job
+             WHERE state = 'queued'
+               AND (date_next_attempt IS NULL OR date_next_attempt <= now() at time zone 'UTC')
+          ORDER BY id
+             LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        """, [limit])
+        jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+        now = fields.Datetime.now()
+        for job in jobs:
+            job.write({
+                'state': 'running',
+                'date_started': now,
+                'attempts': job.attempts + 1,
+            })
+            self.env['medical.transcription.timing']._record(
+                f'job.{job.job_type}.queue_wait',
+                (now - job.create_date).total_seconds(),
+                template=job.transcription_id.template_type,
+            )
+        jobs.filtered(lambda job: job.job_type == 'transcribe')._notify_progress('accepted')
+        self.env.cr.commit()
+        return jobs
+
+    @api.model
+    def _requeue_stale_jobs(self):
+        """Recover jobs left running by a killed worker"""
+        timeout = self.env['medical.transcription.api']._get_api_timeout()
+        limit_date = fields.Datetime.now() - timedelta(seconds=2 * timeout + 60)
+        stale_jobs = self.search([
+            ('state', '=', 'running'),
+            ('date_started', '<', limit_date),
+        ])
+        for job in stale_jobs:
+            if job.attempts < self.MAX_ATTEMPTS:
+                _logger.warning(f"Requeuing stale transcription job {job.id}")
+                job.state = 'queued'
+            else:
+                job._fail('Job abandoned after too many attempts')
+
+    def _run_transcriptions(self):
+        """Send the audio of the jobs (whole or split at silences) to the Flask API concurrently"""
+        if not self:
+            return
+        api_client = self.env['medical.transcription.api']
+        try:
+            endpoint = api_client._get_endpoint()
+        except Exception as e:
+            self._fail(api_client._format_error(e))
+            return
+        timeout = api_client._get_api_timeout()
+        concurrency = max(1, api_client._get_int_param('medical_transcription.max_concurrency', 4))
+        log_level = api_client._get_log_level()
+        timing = self.env['medical.transcription.timing']
+        audio_format = self._get_audio_format()
+
+        with contextlib.ExitStack() as stack:
+            calls = []
+            segmented = set()
+            jobs = self.browse()
+            for job in self:
+                params = json.loads(job.params_json or '{}')
+                transcription = job.transcription_id
+                try:
+                    # Files opened for this job only, closed at once if it fails
+                    with contextlib.ExitStack() as job_stack:
+                        audio, size = job_stack.enter_context(transcription._open_audio())
+                        _logger.log(log_level, f"=== TRANSCRIBE JOB START === job={job.id}, "
+                                               f"record={transcription.id}, {size} bytes")
+                        call = job._get_transcribe_call(audio, size, params, log_level, audio_format)
+                        with timing._timed('job.transcribe.split_audio', transcription.template_type):
+                            segments = job._split_audio(audio, size, audio_format=audio_format or 'wav')
+                        for segment, _size in segments:
+                            job_stack.enter_context(segment)
+                        stack.enter_context(job_stack.pop_all())
+                except Exception as e:
+                    # Only this job fails, the others of the batch are still sent
+                    _logger.error(f"Could not prepare transcription job {job.id}: {e}\n{traceback.format_exc()}")
+                    job._fail(f'Could not read the recording: {e}')
+                    continue
+                jobs |= job
+                job.audio_size = size
+                if segments:
+                    segmented.add(job)
+                else:
+                    calls.append(call)
+                for index, (segment, segment_size) in enumerate(segments):
+                    calls.append({
+                        'job': job,
+                        'name': f'{transcription.name} [{index + 1}/{len(segments)}]',
+                        'audio': segment,
+                        'size': segment_size,
+                        'filename': f'{os.path.splitext(call["filename"])[0]}_{index:03d}.'
+                                    f'{audio_tools.SPEECH_FORMATS[audio_format or "wav"][1]}',
+                        'data': dict(call['data'], transcribe_only='true'),
+                        'log_level': log_level,
+                    })
+            if not calls:
+                return
+            with ThreadPoolExecutor(max_workers=min(len(calls), concurrency)) as executor:
+                call_results = list(executor.map(
+                    lambda call: _dispatch_transcription(endpoint, call, timeout), calls))
+
+        results = {}
+        backends = {}
+        sent_sizes = {}
+        for call, result in zip(calls, call_results):
+            results.setdefault(call['job'], []).append(result)
+            backends[call['job']] = call.get('api_url')
+            sent_sizes[call['job']] = sent_sizes.get(call['job'], 0) + call.get('sent_size', call['size'])
+            template = call['job'].transcription_id.template_type
+            stage = 'api_transcribe_segment' if call['job'] in segmented else 'api_transcribe'
+            timing._record(f'job.transcribe.{stage}', call['duration'], template=template)
+            if 'normalize_duration' in call:
+                timing._record('job.transcribe.normalize_audio', call['normalize_duration'], template=template)
+        for job, sent_size in sent_sizes.items():
+            job.audio_sent_size = sent_size
+            if sent_size < job.audio_size:
+                _logger.info(f"Job {job.id}: sent {sent_size} bytes of audio instead of {job.audio_size} "
+                             f"({job.audio_size - sent_size} bytes saved)")
+        extractions = []
+        unsupported = self.browse()
+        for job in jobs:
+            if job not in segmented:
+                results[job] = results[job][0]
+                continue
+            if any(_is_unsupported(result, segment=True) for result in results[job]):
+                unsupported |= job
+                continue
+            text = _stitch_segments(results[job])
+            if not isinstance(text, str):
+                results[job] = text
+                continue
+            job._notify_progress('transcribed')
+            params = json.loads(job.params_json or '{}')
+            data = job.transcription_id._get_transcribe_form_data(params)
+            extractions.append({
+                'job': job,
+                'name': job.transcription_id.name,
+                'log_level': log_level,
+                'payload': {
+                    'text': text,
+                    'fields': json.loads(data['fields']),
+                    'allow_additional': True,
+                    'input_language': data['input_language'],
+                    'output_language': data['output_language'],
+                },
+            })
+        if extractions:
+            with ThreadPoolExecutor(max_workers=min(len(extractions), concurrency)) as executor:
+                extracted = list(executor.map(
+                    lambda call: _dispatch_extraction(endpoint, call, timeout), extractions))
+            for call, result in zip(extractions, extracted):
+                timing._record('job.transcribe.api_extract', call['duration'],
+                               template=call['job'].transcription_id.template_type)
+                if _is_unsupported(result):
+                    unsupported |= call['job']
+                    continue
+                if isinstance(result, dict):
+                    result.setdefault('whisper_transcription', call['payload']['text'])
+                results[call['job']] = result
+                backends[call['job']] = call.get('api_url')
+
+        if unsupported:
+            # The API lacks transcribe_only or /api/medical/extract despite the
+            # probe: send the recordings whole and stop splitting
+            self.env['ir.config_parameter'].sudo().set_param(SEGMENTATION_SUPPORTED_PARAM, '0')
+            _logger.warning(f"The API rejected segment transcription, sending {len(unsupported)} "
+                            f"recording(s) whole; segmentation disabled until the setting is saved again")
+            for job, (result, api_url) in unsupported._transcribe_whole(
+                    endpoint, timeout, concurrency, log_level, audio_format).items():
+                results[job] = result
+                backends[job] = api_url
+
+        for job in jobs:
+            job._apply_transcription_result(results[job], api_url=backends.get(job))
+
+    def _get_transcribe_call(self, audio, size, params, log_level, audio_format):
+        """Dispatch call sending the whole recording of the job"""
+        self.ensure_one()
+        transcription = self.transcription_id
+        return {
+            'job': self,
+            'name': transcription.name,
+            'audio': audio,
+            'size': size,
+            'filename': params.get('audio_filename') or transcription.audio_filename or 'audio.wav',
+            'data': transcription._get_transcribe_form_data(params),
+            'log_level': log_level,
+            'audio_format': audio_format,
+        }
+
+    def _transcribe_whole(self, endpoint, timeout, concurrency, log_level, audio_format):
+        """Send the recordings of the jobs whole, concurrently.
+
+        Returns ``{job: (result or exception, api_url)}``.
+        """
+        timing = self.env['medical.transcription.timing']
+        outcomes = {}
+        with contextlib.ExitStack() as stack:
+            calls = []
+            for job in self:
+                try:
+                    audio, size = stack.enter_context(job.transcription_id._open_audio())
+                except Exception as e:
+                    outcomes[job] = (e, None)
+                    continue
+                calls.append(job._get_transcribe_call(
+                    audio, size, json.loads(job.params_json or '{}'), log_level, audio_format))
+            if not calls:
+                return outcomes
+            with ThreadPoolExecutor(max_workers=min(len(calls), concurrency)) as executor:
+                call_results = list(executor.map(
+                    lambda call: _dispatch_transcription(endpoint, call, timeout), calls))
+        for call, result in zip(calls, call_results):
+            template = call['job'].transcription_id.template_type
+            timing._record('job.transcribe.api_transcribe', call['duration'], template=template)
+            if 'normalize_duration' in call:
+                timing._record('job.transcribe.normalize_audio', call['normalize_duration'], template=template)
+            call['job'].audio_sent_size += call.get('sent_size', call['size'])
+            outcomes[call['job']] = (result, call.get('api_url'))
+        return outcomes
+
+    @api.model
+    def _get_audio_format(self):
+        """Format the audio is normalized to before it is sent, or ``''``.
+
+        See ``medical_transcription.audio_format`` (``flac`` or ``opus``);
+        normalization needs ffmpeg.
+        """
+        audio_format = self.env['ir.config_parameter'].sudo().get_param('medical_transcription.audio_format') or ''
+        if audio_format not in audio_tools.SPEECH_FORMATS:
+            return ''
+        if not audio_tools.FFMPEG:
+            _logger.warning("Audio normalization is enabled but ffmpeg is not installed")
+            return ''
+        return audio_format
+
+    @api.model
+    def _is_segmentation_supported(self):
+        """Whether the API backends serve ``/api/medical/extract``, probed once.
+
+        The probe is an ``OPTIONS`` request, answered without running any
+        pipeline; its result is kept in ``SEGMENTATION_SUPPORTED_PARAM``.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        supported = ICP.get_param(SEGMENTATION_SUPPORTED_PARAM)
+        if supported in ('0', '1'):
+            return supported == '1'
+        api_client = self.env['medical.transcription.api']
+        try:
+            statuses = [
+                api_client._request('OPTIONS', '/api/medical/extract', timeout=10, api_url=api_url).status_code
+                for api_url in api_client._get_api_urls()
+            ]
+        except Exception as e:
+            # Unknown yet: send whole, probe again with the next long recording
+            _logger.warning(f"Could not probe the API for segment transcription: {e}")
+            return False
+        supported = all(status < 400 for status in statuses)
+        _logger.info(f"API segment transcription support: {supported}")
+        ICP.set_param(SEGMENTATION_SUPPORTED_PARAM, '1' if supported else '0')
+        return supported
+
+    def _split_audio(self, audio, size, audio_format='wav'):
+        """Split a long recording at silences if enabled and supported by the API; ``[]`` to send it whole"""
+        api_client = self.env['medical.transcription.api']
+        ICP = self.env['ir.config_parameter'].sudo()
+        if not ICP.get_param('medical_transcription.segmentation_enabled'):
+            return []
+        if size < api_client._get_int_param('medical_transcription.segmentation_min_size_kb', 1024) * 1024:
+            return []
+        if not self._is_segmentation_supported():
+            return []
+        if audio_tools.AudioSegment is None:
+            _logger.warning("Audio segmentation is enabled but pydub is not installed")
+            return []
+        try:
+            return audio_tools.split_at_silences(
+                audio,
+                min_duration=api_client._get_int_param('medical_transcription.segmentation_min_duration', 600),
+                segment_duration=max(30, api_client._get_int_param(
+                    'medical_transcription.segment_duration', 300)),
+                silence_threshold=api_client._get_int_param('medical_transcription.silence_threshold', -40),
+                min_silence_ms=api_client._get_int_param('medical_transcription.min_silence_ms', 700),
+                audio_format=audio_format,
+            )
+        except Exception as e:
+            # Segmentation is an optimization: fall back to the whole file
+            _logger.warning(f"Could not split audio of job {self.id}, sending it whole: {e}")
+            audio.seek(0)
+            return []
+
+    def _apply_transcription_result(self, result, api_url=None):
+        """Store a Flask API result (or the exception raised) on the job.
+
+        ``api_url`` is the backend that produced the result.
+        """
+        self.ensure_one()
+        if isinstance(result, Exception):
+            _logger.error(f"Transcription job {self.id} failed: {result}")
+            self._fail(self.env['medical.transcription.api']._format_error(result))
+            return
+        if not result.get('success'):
+            self._fail(result.get('error') or 'Transcription failed (unknown reason)')
+            return
+
+        params = json.loads(self.params_json or '{}')
+        transcription = self.transcription_id.with_user(self.user_id)
+        try:
+            with self.env.cr.savepoint(), \
+                    self.env['medical.transcription.timing']._timed(
+                        'job.transcribe.record_write', transcription.template_type):
+                transcription._apply_api_result(result, api_url=api_url)
+        except Exception as e:
+            _logger.error(f"Failed to update record: {e}\n{traceback.format_exc()}")
+            self._fail(f'Failed to update record: {str(e)}')
+            return
+
+        # Add template info to result for frontend
+        result['template'] = {
+            'fields': params.get('template_fields') or []
+        }
+        self.write({
+            'state': 'done',
+            'date_done': fields.Datetime.now(),
+            'result_json': json.dumps(result, ensure_ascii=False),
+            'error_message': False,
+        })
+        self._notify_progress('extracted')
+        self.env['medical.transcription.timing']._record(
+            'job.transcribe.total',
+            (self.date_done - self.create_date).total_seconds(),
+            template=transcription.template_type,
+        )
+        _logger.log(self.env['medical.transcription.api']._get_log_level(),
+                    f"=== TRANSCRIBE JOB END === job={self.id}")
+
+        # Download and store generated files if available
+        files = result.get('files', {})
+        self._enqueue_artifacts(transcription, [
+            (files.get('pdf'), 'pdf'),
+            (files.get('json'), 'json'),
+        ])
+
+    @api.model
+    def _enqueue_artifacts(self, transcription, files):
+        """Queue the download of ``(file_path, file_type)`` API files"""
+        return self._enqueue_artifacts_batch(transcription, [files])
+
+    @api.model
+    def _enqueue_artifacts_batch(self, transcriptions, files_list):
+        """Queue the downloads of several transcriptions in a single ``create``"""
+        targets, params_list = [], []
+        for transcription, files in zip(transcriptions, files_list):
+            files = [[path, file_type] for path, file_type in files if path]
+            if files:
+                targets.append(transcription)
+                params_list.append({'files': files})
+        if targets:
+            return self.sudo()._enqueue_batch(targets, params_list, job_type='artifacts')
+        return self.browse()
+
+    def _run_artifacts(self):
+        """Download the generated files concurrently into the filestore"""
+        params = json.loads(self.params_json or '{}')
+        try:
+            with self.env.cr.savepoint(), \
+                    self.env['medical.transcription.timing']._timed(
+                        'job.artifacts.download_store', self.transcription_id.template_type):
+                success = self.transcription_id._download_and_store_files(params.get('files', []))
+        except Exception as e:
+            _logger.error(f"Artifacts job {self.id} failed: {e}\n{traceback.format_exc()}")
+            success = False
+
+        if success:
+            self.write({'state': 'done', 'date_done': fields.Datetime.now(), 'error_message': False})
+            self._notify_progress('artifacts_stored')
+        elif self.attempts < self.MAX_ATTEMPTS:
+            # Retried later, so that a short API outage does not use up the attempts
+            date_next_attempt = fields.Datetime.now() + timedelta(
+                seconds=self.RETRY_DELAY * 2 ** (self.attempts - 1))
+            self.write({
+                'state': 'queued',
+                'date_next_attempt': date_next_attempt,
+                'error_message': 'Some files could not be downloaded',
+            })
+            self._trigger_processing(at=date_next_attempt)
+        else:
+            self._fail('Some files could not be downloaded')
+
+    def _fail(self, error_msg):
+        """Mark the job and, for transcriptions, its record as failed"""
+        self.write({
+            'state': 'failed',
+            'date_done': fields.Datetime.now(),
+            'error_message': error_msg,
+        })
+        self.filtered(lambda job: job.job_type == 'transcribe').transcription_id.write({
+            'state': 'error',
+            'error_message': error_msg,
+        })
+        self._notify_progress('failed')
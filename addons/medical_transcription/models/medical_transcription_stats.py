@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Key of the advisory lock serializing the refreshes
+REFRESH_LOCK = 'medical_transcription_stats_refresh'
+# One-row table holding the date of the last refresh; not an
+# ir.config_parameter, whose writes clear the ormcache of every worker
+REFRESH_STATE_TABLE = 'medical_transcription_stats_refresh'
+# Days to recompute at the next refresh whatever their write_date (deletions)
+DIRTY_DAYS_TABLE = 'medical_transcription_stats_dirty'
+# write_date is the start of the writing transaction, which commits up to a
+# whole job run later (transcription, extraction and whole-file fallback
+# calls, each up to the API timeout), plus this margin
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+class MedicalTranscriptionStats(models.Model):
+    """Number of transcriptions per day, state and template.
+
+    A summary table maintained from ``medical_transcription``, so the
+    dashboard reads a few rows per day instead of grouping the whole table.
+    Only the days holding transcriptions modified since the last refresh
+    are recomputed (see ``_refresh``). Days are UTC dates.
+    """
+    _name = 'medical.transcription.stats'
+    _description = 'Medical Transcription Statistics'
+    _order = 'date desc'
+    _log_access = False
+
+    date = fields.Date(string='Date', required=True, index=True, readonly=True)
+    state = fields.Selection(
+        lambda self: self.env['medical.transcription']._fields['state'].selection,
+        string='State',
+        readonly=True,
+    )
+    template_name = fields.Char(string='Template', readonly=True)
+    count = fields.Integer(string='Transcriptions', readonly=True, group_operator='sum')
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {REFRESH_STATE_TABLE} (
+                id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                refreshed_at timestamp
+            )
+        """)
+        self.env.cr.execute(f"CREATE TABLE IF NOT EXISTS {DIRTY_DAYS_TABLE} (date date PRIMARY KEY)")
+
+    @api.model
+    def _refresh(self, full=False):
+        """Bring the summary up to date; returns False if another refresh is running.
+
+        Without a previous refresh (or with ``full``) the whole summary is
+        rebuilt.
+        """
+        cr = self.env.cr
+        cr.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", [REFRESH_LOCK])
+        if not cr.fetchone()[0]:
+            return False
+        cr.execute("SELECT now() at time zone 'UTC'")
+        started_at = cr.fetchone()[0]
+        cr.execute(f"SELECT refreshed_at FROM {REFRESH_STATE_TABLE}")
+        row = cr.fetchone()
+        refreshed_at = row and row[0]
+
+        source = self.env['medical.transcription']._table
+        cr.execute(f"DELETE FROM {DIRTY_DAYS_TABLE} RETURNING date")
+        dirty_days = [row[0] for row in cr.fetchall()]
+        if full or not refreshed_at:
+            cr.execute(f"DELETE FROM {self._table}")
+            cr.execute(f"""
+                INSERT INTO {self._table} (date, state, template_name, count)
+                SELECT create_date::date, state, template_name, count(*)
+                  FROM {source}
+              GROUP BY 1, 2, 3
+            """)
+            _logger.info(f"Rebuilt transcription statistics ({cr.rowcount} rows)")
+        else:
+            cr.execute(f"""
+                SELECT DISTINCT create_date::date FROM {source} WHERE write_date >= %s
+            """, [refreshed_at - self._get_refresh_overlap()])
+            self._refresh_days(dirty_days + [row[0] for row in cr.fetchall()])
+        cr.execute(f"""
+            INSERT INTO {REFRESH_STATE_TABLE} (id, refreshed_at) VALUES (1, %s)
+            ON CONFLICT (id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+        """, [started_at])
+        return True
+
+    @api.model
+    def _get_refresh_overlap(self):
+        """How far before the last refresh modified rows are looked for"""
+        timeout = self.env['medical.transcription.api']._get_api_timeout()
+        return REFRESH_MARGIN + timedelta(seconds=3 * timeout)
+
+    @api.model
+    def _mark_dirty(self, days):
+        """Have the next refresh recompute ``days``, and schedule it"""
+        if not days:
+            return
+        self.env.cr.execute(f"""
+            INSERT INTO {DIRTY_DAYS_TABLE} (date) SELECT unnest(%s::date[]) ON CONFLICT DO NOTHING
+        """, [list(days)])
+        self.env.ref('medical_transcription.ir_cron_refresh_stats').sudo()._trigger()
+
+    @api.model
+    def _refresh_days(self, days):
+        """Recompute the summary rows of ``days``"""
+        days = sorted(set(days))
+        if not days:
+            return
+        source = self.env['medical.transcription']._table
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE date = ANY(%s)", [days])
+        # The range lets PostgreSQL use the create_date index
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table} (date, state, template_name, count)
+            SELECT create_date::date, state, template_name, count(*)
+              FROM {source}
+             WHERE create_date >= %s AND create_date < %s
+               AND create_date::date = ANY(%s)
+          GROUP BY 1, 2, 3
+        """, [days[0], days[-1] + timedelta(days=1), days])
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh(self):
+        self._refresh()
+
+    @api.model
+    def action_open_dashboard(self):
+        """Refresh the summary, then open the dashboard"""
+        self.sudo()._refresh()
+        return self.env['ir.actions.act_window']._for_xml_id(
+            'medical_transcription.action_medical_transcription_stats')
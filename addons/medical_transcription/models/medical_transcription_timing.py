@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import logging
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+METRIC_NAME = 'medical_transcription_stage_seconds'
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class MedicalTranscriptionTiming(models.Model):
+    """Duration of one stage of the transcription pipeline.
+
+    Stages are timed in HTTP workers (controller routes) and in the cron
+    worker running the jobs; rows are shared by all processes so the
+    metrics cover both. Rows are inserted in SQL to keep the cost of a
+    measure negligible.
+    """
+    _name = 'medical.transcription.timing'
+    _description = 'Medical Transcription Stage Timing'
+    _order = 'id desc'
+    _log_access = False
+
+    stage = fields.Char(string='Stage', required=True, index=True)
+    template = fields.Char(string='Template')
+    duration = fields.Float(string='Duration (seconds)', digits=(16, 4))
+    date = fields.Datetime(string='Date', required=True, index=True, default=fields.Datetime.now)
+
+    @api.model
+    def _record(self, stage, duration, template=None):
+        """Store a measure; never fails the timed operation"""
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(f"""
+                    INSERT INTO {self._table} (stage, template, duration, date)
+                    VALUES (%s, %s, %s, (now() at time zone 'UTC'))
+                """, [stage, template or None, duration])
+        except Exception as e:
+            _logger.debug(f"Could not record timing of {stage}: {e}")
+
+    @api.model
+    @contextlib.contextmanager
+    def _timed(self, stage, template=None):
+        """Measure the duration of the ``with`` block as ``stage``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(stage, time.perf_counter() - start, template=template)
+
+    @api.model
+    def _render_prometheus(self):
+        """Return the quantiles of each stage and template in Prometheus text format.
+
+        Quantiles are computed over the last
+        ``medical_transcription.metrics_window`` seconds.
+        """
+        window = self.env['medical.transcription.api']._get_int_param(
+            'medical_transcription.metrics_window', 3600)
+        self.env.cr.execute(f"""
+            SELECT stage, COALESCE(template, ''), count(*), sum(duration),
+                   percentile_cont(%s) WITHIN GROUP (ORDER BY duration),
+                   percentile_cont(%s) WITHIN GROUP (ORDER BY duration),
+                   percentile_cont(%s) WITHIN GROUP (ORDER BY duration)
+              FROM {self._table}
+             WHERE date >= %s
+          GROUP BY 1, 2
+          ORDER BY 1, 2
+        """, [*QUANTILES, fields.Datetime.now() - timedelta(seconds=window)])
+
+        lines = [
+            f'# HELP {METRIC_NAME} Duration of the transcription pipeline stages over the last {window}s',
+            f'# TYPE {METRIC_NAME} summary',
+        ]
+        for stage, template, count, total, *values in self.env.cr.fetchall():
+            labels = f'stage="{_escape_label(stage)}",template="{_escape_label(template)}"'
+            for quantile, value in zip(QUANTILES, values):
+                lines.append(f'{METRIC_NAME}{{{labels},quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    @api.model
+    def _cron_prune(self):
+        """Delete measures older than ``medical_transcription.metrics_retention_days``"""
+        days = self.env['medical.transcription.api']._get_int_param(
+            'medical_transcription.metrics_retention_days', 7)
+        self.env.cr.execute(
+            f"DELETE FROM {self._table} WHERE date < %s",
+            [fields.Datetime.now() - timedelta(days=max(days, 1))],
+        )
+        _logger.info(f"Pruned {self.env.cr.rowcount} stage timing(s)")
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields
 
+from .medical_transcription_job import SEGMENTATION_SUPPORTED_PARAM
+
 
 class ResConfigSettings(models.TransientModel):
     _inherit = 'res.config.settings'
@@ -13,9 +15,134 @@ class ResConfigSettings(models.TransientModel):
              'For Docker: use host.docker.internal (Mac/Windows) or container IP (Linux)'
     )
 
+    medical_transcription_api_urls = fields.Char(
+        string='API Backends',
+        config_parameter='medical_transcription.api_urls',
+        help='Base URLs of several Flask API instances, separated by commas or spaces. '
+             'Requests go to the least busy healthy backend; leave empty to use the API URL only'
+    )
+
     medical_transcription_api_timeout = fields.Integer(
         string='API Timeout (seconds)',
         config_parameter='medical_transcription.api_timeout',
         default=300,
         help='Timeout for transcription requests in seconds (default: 300)'
     )
+
+    medical_transcription_max_concurrency = fields.Integer(
+        string='Max Concurrent Transcriptions',
+        config_parameter='medical_transcription.max_concurrency',
+        default=4,
+        help='Number of queued transcriptions sent to the API at the same time '
+             'by each job runner (cron thread)'
+    )
+
+    medical_transcription_templates_cache_ttl = fields.Integer(
+        string='Templates Cache TTL (seconds)',
+        config_parameter='medical_transcription.templates_cache_ttl',
+        default=3600,
+        help='How long the template catalogue is served from the local cache '
+             'before being revalidated against the API (0 = revalidate every time)'
+    )
+
+    medical_transcription_pool_size = fields.Integer(
+        string='Connection Pool Size',
+        config_parameter='medical_transcription.pool_size',
+        default=10,
+        help='Number of keep-alive connections to the API kept open per Odoo worker'
+    )
+
+    medical_transcription_max_retries = fields.Integer(
+        string='Max Retries',
+        config_parameter='medical_transcription.max_retries',
+        default=3,
+        help='Retries with exponential backoff for idempotent (GET) API calls'
+    )
+
+    medical_transcription_breaker_threshold = fields.Integer(
+        string='Circuit Breaker Threshold',
+        config_parameter='medical_transcription.breaker_threshold',
+        default=5,
+        help='Consecutive API failures after which calls fail immediately'
+    )
+
+    medical_transcription_breaker_cooldown = fields.Integer(
+        string='Circuit Breaker Cooldown (seconds)',
+        config_parameter='medical_transcription.breaker_cooldown',
+        default=30,
+        help='Delay before a failing API is probed again'
+    )
+
+    medical_transcription_dedup_ttl_days = fields.Integer(
+        string='Result Cache Expiry (days)',
+        config_parameter='medical_transcription.dedup_ttl_days',
+        default=30,
+        help='Identical transcription requests (same audio and settings) are answered '
+             'from a previous result for this many days (0 = disabled)'
+    )
+
+    medical_transcription_dedup_max_entries = fields.Integer(
+        string='Result Cache Size',
+        config_parameter='medical_transcription.dedup_max_entries',
+        default=10000,
+        help='Maximum number of transcription results kept in the cache; '
+             'the oldest ones are evicted every day'
+    )
+
+    medical_transcription_audio_format = fields.Selection(
+        [('flac', 'FLAC (lossless)'), ('opus', 'Opus')],
+        string='Normalize Audio To',
+        config_parameter='medical_transcription.audio_format',
+        help='Convert recordings to 16 kHz mono before sending them to the API, which '
+             'only uses that. Leave empty to send them unchanged (requires ffmpeg)'
+    )
+
+    medical_transcription_audio_cold_after_days = fields.Integer(
+        string='Archive Recordings After (days)',
+        config_parameter='medical_transcription.audio_cold_after_days',
+        default=0,
+        help='Recordings of validated transcriptions older than this are recompressed and '
+             'moved out of the filestore to cold storage (0: never)'
+    )
+
+    medical_transcription_segmentation_enabled = fields.Boolean(
+        string='Split Long Recordings',
+        config_parameter='medical_transcription.segmentation_enabled',
+        help='Split long recordings at silences and transcribe the segments in parallel '
+             '(requires pydub, ffmpeg and an API serving /api/medical/extract, checked once)'
+    )
+
+    medical_transcription_segmentation_min_duration = fields.Integer(
+        string='Split Recordings Longer Than (seconds)',
+        config_parameter='medical_transcription.segmentation_min_duration',
+        default=600,
+        help='Recordings shorter than this are sent as a whole'
+    )
+
+    medical_transcription_segment_duration = fields.Integer(
+        string='Segment Duration (seconds)',
+        config_parameter='medical_transcription.segment_duration',
+        default=300,
+        help='Target duration of each segment; cuts are made at the nearest silence'
+    )
+
+    medical_transcription_verbose_logging = fields.Boolean(
+        string='Verbose Logging',
+        config_parameter='medical_transcription.verbose_logging',
+        help='Log every transcription request, API call and download at INFO level '
+             '(DEBUG otherwise)'
+    )
+
+    medical_transcription_metrics_token = fields.Char(
+        string='Metrics Token',
+        config_parameter='medical_transcription.metrics_token',
+        help='Token required by /medical_transcription/metrics (Prometheus format); '
+             'the endpoint is disabled while empty'
+    )
+
+    def set_values(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        if bool(ICP.get_param('medical_transcription.segmentation_enabled')) != self.medical_transcription_segmentation_enabled:
+            # Probe the API again for segment transcription (see _is_segmentation_supported)
+            ICP.set_param(SEGMENTATION_SUPPORTED_PARAM, False)
+        super().set_values()
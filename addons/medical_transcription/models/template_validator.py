@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Local validation of reviewed data against the template field definitions.
+
+A template definition is compiled once into a ``TemplateValidator`` (per
+field checks, compiled patterns) and cached by definition, so validating
+a record only runs the checks. No ORM here.
+"""
+import functools
+import json
+import re
+
+# Compiled validators kept, one per distinct template definition
+CACHE_SIZE = 256
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, str) and not value.strip()) or value in ([], {})
+
+
+def _check_number(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(str(value).replace(',', '.'))
+    except ValueError:
+        return False
+    return True
+
+
+TYPE_CHECKS = {
+    'number': (_check_number, 'must be a number'),
+    'integer': (lambda value: not isinstance(value, bool) and re.fullmatch(r'\s*-?\d+\s*', str(value)) is not None,
+                'must be an integer'),
+    'date': (lambda value: re.fullmatch(r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}', str(value).strip()) is not None,
+             'must be a date (YYYY-MM-DD or DD/MM/YYYY)'),
+    'boolean': (lambda value: isinstance(value, bool) or str(value).lower() in ('true', 'false', 'oui', 'non'),
+                'must be yes or no'),
+}
+
+
+class TemplateValidator:
+    """Checks of one template definition.
+
+    Each field may declare ``required``, ``type`` (``number``, ``integer``,
+    ``date``, ``boolean``, anything else is free text), ``max_length``,
+    ``pattern`` (regular expression) and ``options`` (allowed values).
+    Keys outside the template are accepted (the API allows additional
+    fields) but must hold JSON scalars, lists or objects.
+    """
+
+    def __init__(self, template_fields):
+        self.fields = []
+        for field in template_fields or []:
+            if isinstance(field, str):
+                field = {'key': field}
+            if not isinstance(field, dict) or not field.get('key'):
+                continue
+            pattern = field.get('pattern')
+            try:
+                pattern = re.compile(pattern) if pattern else None
+            except re.error:
+                pattern = None
+            options = field.get('options') or field.get('choices')
+            try:
+                max_length = int(field.get('max_length') or 0)
+            except (TypeError, ValueError):
+                max_length = 0
+            self.fields.append({
+                'key': field['key'],
+                'label': field.get('label') or field['key'],
+                'required': bool(field.get('required')),
+                'type_check': TYPE_CHECKS.get(field.get('type')),
+                'max_length': max_length if max_length > 0 else None,
+                'pattern': pattern,
+                'options': {str(option.get('value', option) if isinstance(option, dict) else option)
+                            for option in options} if isinstance(options, list) else None,
+            })
+
+    def validate(self, data):
+        """Return the errors of ``data`` as ``[{key, label, message}]``"""
+        if not isinstance(data, dict):
+            return [{'key': None, 'label': None, 'message': 'Validated data must be an object'}]
+        errors = []
+        for field in self.fields:
+            value = data.get(field['key'])
+            if _is_empty(value):
+                if field['required']:
+                    errors.append(dict(key=field['key'], label=field['label'], message='is required'))
+                continue
+            message = self._check_value(field, value)
+            if message:
+                errors.append(dict(key=field['key'], label=field['label'], message=message))
+        for key, value in data.items():
+            if not isinstance(key, str) or not key:
+                errors.append(dict(key=key, label=key, message='invalid field name'))
+            elif not isinstance(value, (*SCALAR_TYPES, list, dict)):
+                errors.append(dict(key=key, label=key, message='invalid value'))
+        return errors
+
+    @staticmethod
+    def _check_value(field, value):
+        if field['type_check'] and not isinstance(value, (list, dict)):
+            check, message = field['type_check']
+            if not check(value):
+                return message
+        if isinstance(value, str):
+            if field['max_length'] and len(value) > field['max_length']:
+                return f"must not exceed {field['max_length']} characters"
+            if field['pattern'] and not field['pattern'].fullmatch(value.strip()):
+                return 'has an invalid format'
+        if field['options'] is not None and str(value) not in field['options']:
+            return 'is not an allowed value'
+        return None
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def get_validator(template_fields_json):
+    """Return the validator of a stored template definition (JSON), compiled once per definition"""
+    template_fields = json.loads(template_fields_json) if template_fields_json else []
+    return TemplateValidator(template_fields if isinstance(template_fields, list) else [])
+
+
+def format_errors(errors):
+    """One line summary of validation errors, for the user"""
+    return '; '.join(
+        f"{error['label']}: {error['message']}" if error.get('label') else error['message']
+        for error in errors
+    )
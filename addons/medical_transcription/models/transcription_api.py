@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+import collections
+import io
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+from odoo import models, api
+
+_logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Only idempotent calls are retried; uploads and validations are sent once
+RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+RETRY_STATUSES = (502, 503, 504)
+
+# Per worker process state, shared by all threads of the worker
+_session_lock = threading.Lock()
+_sessions = {}
+_breakers = {}
+# Requests in progress per API backend, for least-outstanding routing
+_outstanding = collections.Counter()
+
+
+class CircuitOpenError(requests.ConnectionError if requests else Exception):
+    """Raised instead of calling an API that is known to be down"""
+
+
+class CircuitBreaker:
+    """Fail fast once an API has failed ``threshold`` times in a row.
+
+    After ``cooldown`` seconds a single probe request is let through; it
+    closes the circuit on success and re-opens it on failure.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+
+    def before_call(self, cooldown):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = cooldown - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(f'API unavailable, retrying in {int(remaining) + 1}s')
+            # Half-open: let this call probe, keep failing fast for the others
+            self.opened_at = time.monotonic()
+
+    def is_closed(self):
+        with self._lock:
+            return self.opened_at is None
+
+    def probe_due(self, cooldown):
+        """True once per cooldown while open: the caller should probe the API"""
+        with self._lock:
+            if self.opened_at is None or time.monotonic() - self.opened_at < cooldown:
+                return False
+            self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self, threshold):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= threshold:
+                if self.opened_at is None:
+                    _logger.warning(f"Circuit opened after {self.failures} consecutive API failures")
+                self.opened_at = time.monotonic()
+
+
+def _get_session(pool_size, max_retries, backoff):
+    """Return the keep-alive session of this worker for the given settings"""
+    key = (os.getpid(), pool_size, max_retries, backoff)
+    with _session_lock:
+        session = _sessions.get(key)
+        if session is None:
+            # Settings changed (or forked worker): drop the previous pools
+            for old_session in _sessions.values():
+                old_session.close()
+            _sessions.clear()
+            retry = Retry(
+                total=max_retries,
+                backoff_factor=backoff,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=RETRY_METHODS,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[key] = session
+        return session
+
+
+def _get_breaker(api_url):
+    with _session_lock:
+        return _breakers.setdefault(api_url, CircuitBreaker())
+
+
+def _probe_backend(session, api_url, health_path, timeout):
+    """Health check of a backend taken out of rotation; updates its breaker"""
+    breaker = _get_breaker(api_url)
+    try:
+        response = session.get(f'{api_url}{health_path}', timeout=timeout)
+        healthy = response.status_code < 500
+    except requests.RequestException:
+        healthy = False
+    if healthy:
+        _logger.info(f"API backend {api_url} is healthy again")
+        breaker.record_success()
+    else:
+        breaker.record_failure(1)
+    return healthy
+
+
+def _acquire_backend(api_urls, session, cooldown, health_path, timeout):
+    """Pick the available backend with the fewest requests in progress.
+
+    Backends whose circuit is open are out of rotation; once their cooldown
+    has elapsed they are health checked and come back if they answer. When
+    every backend is down, the first one is returned (and fails fast).
+    The caller must call ``_release_backend`` when its request is done.
+    """
+    available = [api_url for api_url in api_urls if _get_breaker(api_url).is_closed()]
+    for api_url in api_urls:
+        if api_url not in available and _get_breaker(api_url).probe_due(cooldown):
+            if _probe_backend(session, api_url, health_path, timeout):
+                available.append(api_url)
+    with _session_lock:
+        if available:
+            fewest = min(_outstanding[api_url] for api_url in available)
+            api_url = random.choice([url for url in available if _outstanding[url] == fewest])
+        else:
+            api_url = api_urls[0]
+        _outstanding[api_url] += 1
+    return api_url
+
+
+def _release_backend(api_url):
+    with _session_lock:
+        _outstanding[api_url] -= 1
+
+
+class MultipartFileStream:
+    """Read-only ``multipart/form-data`` body built around an open file.
+
+    ``requests`` would otherwise encode the whole file in memory; this
+    object exposes ``read``/``__len__`` so the body is sent in chunks with
+    a proper ``Content-Length``.
+    """
+
+    def __init__(self, data, file_field, filename, fileobj, size,
+                 content_type='application/octet-stream'):
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        filename = filename.replace('"', '_').replace('\r', '').replace('\n', '')
+        head = ''.join(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n'
+            for name, value in data.items()
+        ) + (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        tail = f'\r\n--{boundary}--\r\n'
+        head, tail = head.encode(), tail.encode()
+        self._parts = [io.BytesIO(head), fileobj, io.BytesIO(tail)]
+        self._length = len(head) + size + len(tail)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return iter(lambda: self.read(STREAM_CHUNK_SIZE), b'')
+
+    def read(self, size=-1):
+        chunks = []
+        while self._parts and (size < 0 or size > 0):
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b''.join(chunks)
+
+
+class ApiEndpoint:
+    """Pooled session, circuit breakers and timeouts of the API backends.
+
+    Each request goes to the least busy healthy backend of ``api_urls``;
+    the backend that answered is set as ``response.api_url``.
+    """
+
+    def __init__(self, api_urls, session, cooldown, threshold, connect_timeout,
+                 health_path='/api/medical/templates'):
+        self.api_urls = api_urls
+        self.session = session
+        self.cooldown = cooldown
+        self.threshold = threshold
+        self.connect_timeout = connect_timeout
+        self.health_path = health_path
+
+    def request(self, method, path, timeout=30, **kwargs):
+        api_url = _acquire_backend(
+            self.api_urls, self.session, self.cooldown, self.health_path, self.connect_timeout)
+        breaker = _get_breaker(api_url)
+        try:
+            breaker.before_call(self.cooldown)
+            response = self.session.request(
+                method,
+                f'{api_url}{path}',
+                timeout=(min(self.connect_timeout, timeout), timeout),
+                **kwargs
+            )
+        except Exception as e:
+            if isinstance(e, (requests.ConnectionError, requests.Timeout)) \
+                    and not isinstance(e, CircuitOpenError):
+                breaker.record_failure(self.threshold)
+            # Let _format_error name the backend that failed
+            e.api_url = api_url
+            raise
+        finally:
+            _release_backend(api_url)
+        if response.status_code >= 500:
+            breaker.record_failure(self.threshold)
+        else:
+            breaker.record_success()
+        response.api_url = api_url
+        return response
+
+    def post_file(self, path, fileobj, size, filename, data, timeout=30,
+                  file_field='audio', content_type='application/octet-stream'):
+        """POST ``fileobj`` as a multipart upload without buffering it"""
+        body = MultipartFileStream(data, file_field, filename, fileobj, size, content_type)
+        return self.request(
+            'POST',
+            path,
+            timeout=timeout,
+            data=body,
+            headers={'Content-Type': body.content_type},
+        )
+
+    def download(self, path, timeout=30):
+        """GET ``path`` into a temporary file, returned rewound"""
+        with self.request('GET', path, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            spool = tempfile.TemporaryFile()
+            try:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    spool.write(chunk)
+            except Exception:
+                spool.close()
+                raise
+        spool.seek(0)
+        return spool
+
+
+class MedicalTranscriptionApi(models.AbstractModel):
+    _name = 'medical.transcription.api'
+    _description = 'Medical Transcription Flask API Client'
+
+    @api.model
+    def _get_api_url(self):
+        """Get API base URL from system parameters"""
+        return self.env['ir.config_parameter'].sudo().get_param(
+            'medical_transcription.api_url',
+            default='http://host.docker.internal:5001'
+        )
+
+    @api.model
+    def _get_api_urls(self):
+        """API backends to balance requests over (default: the API URL alone)"""
+        value = self.env['ir.config_parameter'].sudo().get_param('medical_transcription.api_urls') or ''
+        api_urls = [url.strip().rstrip('/') for url in re.split(r'[\s,;]+', value) if url.strip()]
+        return list(dict.fromkeys(api_urls)) or [self._get_api_url().rstrip('/')]
+
+    @api.model
+    def _get_api_timeout(self):
+        """Get API timeout from system parameters"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'medical_transcription.api_timeout',
+            default='300'
+        ))
+
+    @api.model
+    def _get_int_param(self, key, default):
+        try:
+            return int(self.env['ir.config_parameter'].sudo().get_param(key, default))
+        except ValueError:
+            return int(default)
+
+    @api.model
+    def _get_log_level(self):
+        """Level of the per-request logs: INFO with verbose logging, DEBUG otherwise"""
+        verbose = self.env['ir.config_parameter'].sudo().get_param('medical_transcription.verbose_logging')
+        return logging.INFO if verbose else logging.DEBUG
+
+    @api.model
+    def _get_session(self):
+        """Return the pooled keep-alive session of the current worker"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        return _get_session(
+            self._get_int_param('medical_transcription.pool_size', 10),
+            self._get_int_param('medical_transcription.max_retries', 3),
+            float(ICP.get_param('medical_transcription.retry_backoff', '0.5')),
+        )
+
+    @api.model
+    def _get_endpoint(self, api_url=None):
+        """Snapshot the API settings into an ``ApiEndpoint``.
+
+        Requests are balanced over the configured backends, or sent to
+        ``api_url`` only when given (e.g. the backend holding a
+        transcription). The endpoint does not use the environment, so it can
+        be shared with worker threads (e.g. for concurrent downloads).
+        """
+        if requests is None:
+            raise ImportError('requests library not installed')
+        return ApiEndpoint(
+            [api_url.rstrip('/')] if api_url else self._get_api_urls(),
+            self._get_session(),
+            cooldown=self._get_int_param('medical_transcription.breaker_cooldown', 30),
+            threshold=self._get_int_param('medical_transcription.breaker_threshold', 5),
+            connect_timeout=self._get_int_param('medical_transcription.connect_timeout', 5),
+            health_path=self.env['ir.config_parameter'].sudo().get_param(
+                'medical_transcription.health_path', '/api/medical/templates'),
+        )
+
+    @api.model
+    def _request(self, method, path, timeout=30, api_url=None, **kwargs):
+        """Send a request to the Flask API and return the response.
+
+        ``path`` is relative to the API URL: the least busy backend, or
+        ``api_url`` when given. Requests go through a pooled session and a
+        circuit breaker: while the API is down calls fail immediately with
+        ``CircuitOpenError``. Network errors are raised as
+        ``requests.RequestException`` for the caller to handle.
+        """
+        return self._get_endpoint(api_url).request(method, path, timeout=timeout, **kwargs)
+
+    @api.model
+    def _download_files(self, paths, timeout=30, api_url=None):
+        """Download several API files concurrently into temporary files.
+
+        Returns ``{path: file object or exception}``. Bodies are streamed to
+        disk, so they are never held in memory as a whole.
+        """
+        endpoint = self._get_endpoint(api_url)
+        max_workers = max(1, self._get_int_param('medical_transcription.download_concurrency', 4))
+        paths = list(dict.fromkeys(paths))
+
+        def fetch(path):
+            try:
+                return endpoint.download(path, timeout=timeout)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths) or 1)) as executor:
+            return dict(zip(paths, executor.map(fetch, paths)))
+
+    @api.model
+    def _request_json_many(self, calls, timeout=30):
+        """Send several JSON requests concurrently.
+
+        ``calls`` is a list of ``(method, path, api_url, kwargs)``, ``api_url``
+        pinning the call to one backend (or ``None``). Returns the decoded
+        JSON answers, or the exception raised, in the order of ``calls``. At
+        most ``medical_transcription.request_concurrency`` calls are in flight.
+        """
+        endpoints = {}
+        for _method, _path, api_url, _kwargs in calls:
+            if api_url not in endpoints:
+                endpoints[api_url] = self._get_endpoint(api_url)
+        max_workers = max(1, self._get_int_param('medical_transcription.request_concurrency', 4))
+
+        def send(call):
+            method, path, api_url, kwargs = call
+            try:
+                response = endpoints[api_url].request(method, path, timeout=timeout, **kwargs)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls) or 1)) as executor:
+            return list(executor.map(send, calls))
+
+    @api.model
+    def _post_file(self, path, fileobj, size, filename, data, timeout=30,
+                   file_field='audio', content_type='application/octet-stream', api_url=None):
+        """POST ``fileobj`` as a multipart upload without buffering it"""
+        return self._get_endpoint(api_url).post_file(
+            path, fileobj, size, filename, data, timeout=timeout,
+            file_field=file_field, content_type=content_type,
+        )
+
+    @api.model
+    def _format_error(self, error):
+        """Turn an exception raised while calling the API into a user message"""
+        if requests is not None:
+            api_url = getattr(error, 'api_url', None) or ', '.join(self._get_api_urls())
+            if isinstance(error, CircuitOpenError):
+                return f'Cannot connect to API at {api_url}: {error}'
+            if isinstance(error, requests.Timeout):
+                return f'API timeout after {self._get_api_timeout()} seconds'
+            if isinstance(error, requests.ConnectionError):
+                return (f'Cannot connect to API at {api_url}. '
+                        'Check if Flask is running and URL is correct.')
+            if isinstance(error, requests.RequestException):
+                return f'API request error: {error}'
+        return f'Unexpected error: {error}'
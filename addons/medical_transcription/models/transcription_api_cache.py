@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+from datetime import timedelta
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Key prefix of the cached transcription lookups (patient data)
+LOOKUP_KEY_PREFIX = 'transcription:'
+
+
+class MedicalTranscriptionApiCache(models.Model):
+    _name = 'medical.transcription.api.cache'
+    _description = 'Medical Transcription API Response Cache'
+    _rec_name = 'key'
+
+    key = fields.Char(string='Key', required=True, index=True)
+    payload = fields.Text(string='Payload (JSON)')
+    etag = fields.Char(string='ETag')
+    last_modified = fields.Char(string='Last-Modified')
+    fetched_at = fields.Datetime(string='Fetched On')
+
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', 'The cache key must be unique.'),
+    ]
+
+    @api.model
+    def _get_payload(self, key, path, ttl, api_url=None):
+        """Return the JSON payload of ``GET path``, cached under ``key``.
+
+        A copy younger than ``ttl`` seconds is returned without any network
+        call. An older copy is revalidated with If-None-Match /
+        If-Modified-Since, and is still served if the API is unreachable.
+        4xx answers are raised as ``requests.HTTPError``. ``api_url`` pins
+        the request to one API backend.
+        """
+        entry = self.sudo().search([('key', '=', key)], limit=1)
+        now = fields.Datetime.now()
+        if entry.payload and entry.fetched_at and entry.fetched_at + timedelta(seconds=ttl) > now:
+            return json.loads(entry.payload)
+
+        headers = {}
+        if entry.payload and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.payload and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = self.env['medical.transcription.api']._request('GET', path, headers=headers, api_url=api_url)
+            if response.status_code == 304 and entry.payload:
+                entry._store({'fetched_at': now})
+                return json.loads(entry.payload)
+            response.raise_for_status()
+            payload = response.json()
+        except requests.RequestException as e:
+            client_error = (isinstance(e, requests.HTTPError)
+                            and e.response is not None and e.response.status_code < 500)
+            if entry.payload and not client_error:
+                _logger.warning(f"API unreachable, serving cached {key} from {entry.fetched_at}: {e}")
+                return json.loads(entry.payload)
+            raise
+
+        if payload.get('success', True):
+            vals = {
+                'payload': json.dumps(payload, ensure_ascii=False),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fetched_at': now,
+            }
+            if entry:
+                entry._store(vals)
+            else:
+                self.sudo()._store(dict(vals, key=key))
+        return payload
+
+    @api.model
+    def _cron_evict_lookups(self):
+        """Delete the cached transcription lookups older than their TTL"""
+        ttl = self.env['medical.transcription.api']._get_int_param('medical_transcription.lookup_cache_ttl', 86400)
+        expired = self.sudo().search([
+            ('key', '=like', f'{LOOKUP_KEY_PREFIX}%'),
+            ('fetched_at', '<', fields.Datetime.now() - timedelta(seconds=max(ttl, 0))),
+        ])
+        if expired:
+            _logger.info(f"Evicting {len(expired)} expired transcription lookup(s) from the API cache")
+            expired.unlink()
+
+    def _store(self, vals):
+        """Best effort write: a concurrent worker may refresh the same key"""
+        try:
+            with self.env.cr.savepoint():
+                if self:
+                    self.write(vals)
+                else:
+                    self.create(vals)
+        except Exception as e:
+            _logger.info(f"Could not store API cache entry: {e}")
@@ -1,14 +1,99 @@
 /** @odoo-module **/
 
 import { Component, useState, onWillUnmount } from "@odoo/owl";
+import { useService } from "@web/core/utils/hooks";
+
+/**
+ * Uploads the chunks of a recording in progress, in order, to
+ * /medical_transcription/upload/<id>/chunk. A chunk that keeps failing
+ * stops the queue; finish() then resumes from the first chunk the server
+ * is missing before joining them.
+ */
+export class ChunkedUpload {
+    static MAX_RETRIES = 3;
+
+    constructor(rpc, transcriptionId) {
+        this.rpc = rpc;
+        this.transcriptionId = transcriptionId;
+        this.blobs = [];
+        this.failed = false;
+        this.queue = Promise.resolve();
+    }
+
+    push(blob) {
+        const index = this.blobs.length;
+        this.blobs.push(blob);
+        this.queue = this.queue.then(async () => {
+            if (this.failed) {
+                return;
+            }
+            try {
+                await this.send(index, blob);
+            } catch (e) {
+                this.failed = true;
+                console.warn(`Audio chunk ${index} upload failed, will resume on stop:`, e);
+            }
+        });
+    }
+
+    async send(index, blob, attempt = 0) {
+        const params = new URLSearchParams({ index, csrf_token: odoo.csrf_token });
+        try {
+            const response = await fetch(`/medical_transcription/upload/${this.transcriptionId}/chunk?${params}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: blob,
+            });
+            const result = await response.json();
+            if (!result.success) {
+                throw new Error(result.error || `HTTP ${response.status}`);
+            }
+        } catch (e) {
+            if (attempt >= ChunkedUpload.MAX_RETRIES) {
+                throw e;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt));
+            return this.send(index, blob, attempt + 1);
+        }
+    }
+
+    async finish(filename, mimetype) {
+        await this.queue;
+        if (this.failed) {
+            const status = await this.rpc(`/medical_transcription/upload/${this.transcriptionId}/status`, {});
+            if (!status.success) {
+                throw new Error(status.error);
+            }
+            for (let index = status.next_index; index < this.blobs.length; index++) {
+                await this.send(index, this.blobs[index]);
+            }
+            this.failed = false;
+        }
+        const result = await this.rpc(`/medical_transcription/upload/${this.transcriptionId}/finalize`, {
+            chunk_count: this.blobs.length,
+            filename,
+            mimetype,
+        });
+        if (!result.success) {
+            throw new Error(result.error || 'Audio upload failed');
+        }
+        return result;
+    }
+}
 
 export class AudioRecorder extends Component {
     static template = "medical_transcription.AudioRecorder";
     static props = {
-        onAudioReady: { type: Function }
+        onAudioReady: { type: Function },
+        // Returns the id of the record receiving the chunks while recording
+        onRecordingStart: { type: Function, optional: true },
     };
 
+    // MediaRecorder emits (and uploads) a chunk every CHUNK_TIMESLICE ms
+    static CHUNK_TIMESLICE = 5000;
+
     setup() {
+        this.rpc = useService("rpc");
         this.state = useState({
             isRecording: false,
             hasRecording: false,
@@ -20,6 +105,7 @@ export class AudioRecorder extends Component {
 
         this.mediaRecorder = null;
         this.audioChunks = [];
+        this.upload = null;
         this.timerInterval = null;
 
         onWillUnmount(() => {
@@ -39,10 +125,25 @@ export class AudioRecorder extends Component {
             });
 
             this.audioChunks = [];
+            this.upload = null;
+            if (this.props.onRecordingStart) {
+                try {
+                    const transcriptionId = await this.props.onRecordingStart();
+                    if (transcriptionId) {
+                        this.upload = new ChunkedUpload(this.rpc, transcriptionId);
+                    }
+                } catch (e) {
+                    // The recording is then uploaded as a whole after Stop
+                    console.warn("Could not prepare the upload while recording:", e);
+                }
+            }
 
             this.mediaRecorder.ondataavailable = (event) => {
                 if (event.data.size > 0) {
                     this.audioChunks.push(event.data);
+                    if (this.upload) {
+                        this.upload.push(event.data);
+                    }
                 }
             };
 
@@ -50,7 +151,7 @@ export class AudioRecorder extends Component {
                 this.processRecording();
             };
 
-            this.mediaRecorder.start();
+            this.mediaRecorder.start(AudioRecorder.CHUNK_TIMESLICE);
             this.state.isRecording = true;
             this.state.recordingTime = 0;
 
@@ -103,13 +204,9 @@ export class AudioRecorder extends Component {
         this.state.filename = `recording_${Date.now()}.${extension}`;
         this.state.hasRecording = true;
 
-        // Convert to base64 and notify parent
-        const reader = new FileReader();
-        reader.onloadend = () => {
-            const base64 = reader.result.split(',')[1];
-            this.props.onAudioReady(base64, this.state.filename);
-        };
-        reader.readAsDataURL(blob);
+        // Hand the raw Blob to the parent, with the upload of the chunks
+        // already sent while recording (if any)
+        this.props.onAudioReady(blob, this.state.filename, this.upload);
     }
 
     onFileImport(ev) {
@@ -132,12 +229,7 @@ export class AudioRecorder extends Component {
         this.state.filename = file.name;
         this.state.hasRecording = true;
 
-        const reader = new FileReader();
-        reader.onloadend = () => {
-            const base64 = reader.result.split(',')[1];
-            this.props.onAudioReady(base64, file.name);
-        };
-        reader.readAsDataURL(file);
+        this.props.onAudioReady(file, file.name);
     }
 
     formatTime(seconds) {
@@ -14,6 +14,8 @@ export class MedicalTranscriptionAction extends Component {
         this.rpc = useService("rpc");
         this.orm = useService("orm");
         this.notification = useService("notification");
+        this.busService = useService("bus_service");
+        this.busService.start();
 
         this.state = useState({
             step: 'select',  // select, record, transcribing, review, validated
@@ -21,6 +23,8 @@ export class MedicalTranscriptionAction extends Component {
             selectedTemplate: null,
             audioData: null,
             audioFilename: null,
+            audioUpload: null,  // Chunks uploaded while recording
+            recordingId: null,  // Record receiving them
             transcriptionId: null,
             extractedData: {},
             templateFields: [],
@@ -30,6 +34,7 @@ export class MedicalTranscriptionAction extends Component {
             reportEditMode: false,
             isLoading: false,
             error: null,
+            progressStage: null,  // Last stage pushed on the bus for the running job
             debugLog: [],  // For debugging
             customFields: [],  // Custom fields added by doctor
             newCustomField: ''  // Input for new custom field
@@ -117,11 +122,24 @@ export class MedicalTranscriptionAction extends Component {
         this.log(`Removed custom field: ${fieldName}`);
     }
 
-    onAudioReady(audioData, filename) {
+    async onRecordingStart() {
+        // The record is created when recording starts so the audio can be
+        // uploaded in chunks meanwhile; it is reused by the next recording
+        // until a transcription is started
+        if (!this.state.recordingId) {
+            const ids = await this.orm.create('medical.transcription', [{ state: 'recording' }]);
+            this.state.recordingId = Array.isArray(ids) ? ids[0] : ids;
+            this.log(`Recording record created with ID: ${this.state.recordingId}`);
+        }
+        return this.state.recordingId;
+    }
+
+    onAudioReady(audioData, filename, upload = null) {
         this.state.audioData = audioData;
         this.state.audioFilename = filename;
+        this.state.audioUpload = upload;
         if (audioData) {
-            this.log(`Audio ready: ${filename}, size: ${audioData.length} chars (base64)`);
+            this.log(`Audio ready: ${filename}, size: ${audioData.size} bytes`);
         } else {
             this.log("Audio cleared");
         }
@@ -138,6 +156,7 @@ export class MedicalTranscriptionAction extends Component {
         this.state.step = 'transcribing';
         this.state.isLoading = true;
         this.state.error = null;
+        this.state.progressStage = null;
         this.log("Starting transcription...");
 
         // Step 1: Create record
@@ -147,14 +166,27 @@ export class MedicalTranscriptionAction extends Component {
             const createData = {
                 template_type: this.state.selectedTemplate.type,
                 template_name: this.state.selectedTemplate.display_name || this.state.selectedTemplate.type,
-                audio_file: this.state.audioData,
                 audio_filename: this.state.audioFilename,
                 template_fields_json: JSON.stringify(this.state.templateFields || []),
                 state: 'transcribing'
             };
             this.log(`Create data keys: ${Object.keys(createData).join(', ')}`);
 
-            const createResult = await this.orm.create('medical.transcription', [createData]);
+            if (this.state.audioUpload) {
+                // Recorded with chunked upload: the record already exists
+                transcriptionId = this.state.audioUpload.transcriptionId;
+                await this.orm.write('medical.transcription', [transcriptionId], createData);
+                this.state.recordingId = null;
+                this.log(`Record ${transcriptionId} updated`);
+            } else if (this.state.recordingId) {
+                // A recording was started then replaced by an imported file:
+                // reuse its record rather than leaving it behind
+                transcriptionId = this.state.recordingId;
+                await this.orm.write('medical.transcription', [transcriptionId], createData);
+                this.state.recordingId = null;
+                this.log(`Record ${transcriptionId} reused`);
+            }
+            const createResult = transcriptionId || await this.orm.create('medical.transcription', [createData]);
             this.log(`Create result type: ${typeof createResult}, value: ${JSON.stringify(createResult)}`);
 
             // Handle different possible return formats
@@ -184,19 +216,39 @@ export class MedicalTranscriptionAction extends Component {
             return;
         }
 
-        // Step 2: Call transcription API
+        // Step 2: Upload audio as binary and queue transcription job
         try {
-            this.log("Step 2: Calling transcription API...");
+            this.log("Step 2: Uploading audio...");
+            if (this.state.audioUpload) {
+                try {
+                    const uploaded = await this.state.audioUpload.finish(
+                        this.state.audioFilename, this.state.audioData.type);
+                    this.log(`Audio chunks assembled: ${uploaded.size} bytes`);
+                } catch (e) {
+                    this.log(`Chunked upload failed (${e.message}), uploading the whole recording`);
+                    await this.uploadAudio(transcriptionId, this.state.audioData, this.state.audioFilename);
+                }
+            } else {
+                await this.uploadAudio(transcriptionId, this.state.audioData, this.state.audioFilename);
+            }
+
+            this.log("Step 3: Queuing transcription job...");
             const apiParams = {
                 transcription_id: transcriptionId,
-                audio_base64: this.state.audioData,
                 audio_filename: this.state.audioFilename,
                 template_type: this.state.selectedTemplate.type,
                 template_fields: this.state.templateFields || []
             };
             this.log(`API params: transcription_id=${transcriptionId}, filename=${this.state.audioFilename}, type=${this.state.selectedTemplate.type}, fields=${this.state.templateFields?.length || 0}`);
 
-            const result = await this.rpc('/medical_transcription/transcribe', apiParams);
+            const queued = await this.rpc('/medical_transcription/transcribe', apiParams);
+            if (!queued.success) {
+                throw new Error(queued.error || 'Transcription failed (unknown reason)');
+            }
+            this.log(`Job queued with ID: ${queued.job_id}`);
+
+            // Step 4: Wait for the background job to finish
+            const result = await this.waitForJob(queued.job_id);
             this.log(`API response success: ${result.success}`);
 
             if (result.success) {
@@ -229,6 +281,72 @@ export class MedicalTranscriptionAction extends Component {
         }
     }
 
+    async uploadAudio(transcriptionId, blob, filename) {
+        // Raw binary upload: no base64 inflation, the server spools it to disk
+        const params = new URLSearchParams({
+            filename: filename || 'audio.wav',
+            csrf_token: odoo.csrf_token,
+        });
+        const response = await fetch(`/medical_transcription/upload/${transcriptionId}?${params}`, {
+            method: 'POST',
+            headers: { 'Content-Type': blob.type || 'application/octet-stream' },
+            body: blob,
+        });
+        const result = await response.json();
+        if (!result.success) {
+            throw new Error(result.error || `Audio upload failed (HTTP ${response.status})`);
+        }
+        this.log(`Audio uploaded: ${result.size} bytes`);
+        return result;
+    }
+
+    waitForJob(jobId) {
+        // Progress is pushed on the bus; the status endpoint is read when the
+        // job ends, and polled slowly in case a notification is missed
+        return new Promise((resolve) => {
+            let finished = false;
+            const finish = (result) => {
+                if (finished) {
+                    return;
+                }
+                finished = true;
+                clearInterval(timer);
+                this.busService.removeEventListener("notification", onNotification);
+                resolve(result);
+            };
+            const check = async () => {
+                try {
+                    const status = await this.rpc('/medical_transcription/job_status', { job_id: jobId });
+                    if (!status.success) {
+                        finish(status);
+                    } else if (status.state === 'done') {
+                        finish(status.result);
+                    } else if (status.state === 'failed') {
+                        finish({ success: false, error: status.error });
+                    }
+                } catch (e) {
+                    finish({ success: false, error: e.message || e.data?.message || JSON.stringify(e) });
+                }
+            };
+            const onNotification = ({ detail: notifications }) => {
+                for (const { type, payload } of notifications) {
+                    if (type !== 'medical_transcription/progress' || payload.job_id !== jobId) {
+                        continue;
+                    }
+                    this.state.progressStage = payload.stage;
+                    this.log(`Progress: ${payload.stage}`);
+                    if (payload.job_state === 'done' || payload.job_state === 'failed') {
+                        check();
+                    }
+                }
+            };
+            this.busService.addEventListener("notification", onNotification);
+            const timer = setInterval(check, MedicalTranscriptionAction.JOB_POLL_INTERVAL);
+            // The job may already be done (e.g. answered from the result cache)
+            check();
+        });
+    }
+
     onFieldChange(fieldKey, value) {
         this.state.extractedData = {
             ...this.state.extractedData,
@@ -248,6 +366,22 @@ export class MedicalTranscriptionAction extends Component {
         this.state.reportEditMode = !this.state.reportEditMode;
     }
 
+    // Fallback polling, progress normally arrives through the bus
+    static JOB_POLL_INTERVAL = 15000;
+
+    static PROGRESS_LABELS = {
+        uploaded: "Audio televerse",
+        accepted: "Envoye a l'API de transcription",
+        transcribed: "Audio transcrit, extraction des donnees...",
+        extracted: "Donnees extraites",
+        artifacts_stored: "Fichiers generes enregistres",
+        failed: "Echec",
+    };
+
+    get progressLabel() {
+        return MedicalTranscriptionAction.PROGRESS_LABELS[this.state.progressStage] || "En file d'attente...";
+    }
+
     // Fields that belong to "INFORMATIONS CLINIQUES" (patient identity)
     static PATIENT_INFO_KEYS = [
         'nom', 'prenom', 'age', 'sexe', 'date_de_naissance',
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_binary_storage
+from . import test_template_validator
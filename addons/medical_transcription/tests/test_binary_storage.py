@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import io
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBinaryStorage(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'file')
+        cls.Transcription = cls.env['medical.transcription']
+        cls.audio = b'RIFF' + bytes(range(256)) * 1024
+
+    def test_store_binary_from_file(self):
+        record = self.Transcription.create({'audio_filename': 'consultation.wav'})
+        size = record._store_binary_from_file('audio_file', io.BytesIO(self.audio), mimetype='audio/wav')
+
+        self.assertEqual(size, len(self.audio))
+        self.assertEqual(base64.b64decode(record.audio_file), self.audio)
+        attachment = record._get_field_attachment('audio_file')
+        self.assertEqual(attachment.checksum, hashlib.sha1(self.audio).hexdigest())
+        self.assertEqual(attachment.file_size, len(self.audio))
+        self.assertEqual(attachment.mimetype, 'audio/wav')
+        with record._open_binary_field('audio_file') as (fileobj, file_size):
+            self.assertEqual(file_size, len(self.audio))
+            self.assertEqual(fileobj.read(), self.audio)
+
+    def test_replace_binary_from_file(self):
+        record = self.Transcription.create({'audio_filename': 'consultation.wav'})
+        record._store_binary_from_file('audio_file', io.BytesIO(b'first recording'))
+        record._store_binary_from_file('audio_file', io.BytesIO(self.audio))
+
+        self.assertEqual(base64.b64decode(record.audio_file), self.audio)
+        self.assertEqual(len(self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', record._name),
+            ('res_id', '=', record.id),
+            ('res_field', '=', 'audio_file'),
+        ])), 1)
+
+    def test_copy_binary_field(self):
+        source = self.Transcription.create({})
+        source._store_binary_from_file('pdf_file', io.BytesIO(b'%PDF-1.4 report'), mimetype='application/pdf')
+        record = self.Transcription.create({})
+        record._copy_binary_field(source, 'pdf_file')
+
+        self.assertEqual(base64.b64decode(record.pdf_file), b'%PDF-1.4 report')
+        self.assertEqual(record._get_field_attachment('pdf_file').checksum,
+                         source._get_field_attachment('pdf_file').checksum)
+
+    def test_request_hash_uses_stored_checksum(self):
+        record = self.Transcription.create({})
+        record._store_binary_from_file('audio_file', io.BytesIO(self.audio))
+        self.assertTrue(record._get_request_hash({'template_type': 'consultation'}))
+
+    def test_cached_result_keeps_api_transcription(self):
+        source = self.Transcription.create({
+            'api_transcription_id': 'abc123',
+            'api_backend_url': 'http://api-1:5000',
+            'medical_report': 'Report',
+            'extracted_data_json': '{"nom": "Dupont"}',
+            'state': 'review',
+        })
+        source._store_binary_from_file('pdf_file', io.BytesIO(b'%PDF-1.4 report'))
+        source.pdf_filename = 'report.pdf'
+        record = self.Transcription.create({})
+        result = record._apply_cached_result(source)
+
+        self.assertFalse(result['transcription_id'])
+        self.assertFalse(record.api_transcription_id)
+        self.assertEqual(record.cached_source_id, source)
+        self.assertEqual(base64.b64decode(record.pdf_file), b'%PDF-1.4 report')
+
+        # Validated locally, the source's API transcription is not touched
+        outcomes = record._validate_batch({record.id: ({'nom': 'Durand'}, 'Corrected report')})
+        self.assertTrue(outcomes[record.id]['success'])
+        self.assertEqual(record.state, 'validated')
+        self.assertEqual(record.get_extracted_data(), {'nom': 'Durand'})
+        self.assertEqual(source.state, 'review')
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests import HttpCase, TransactionCase, tagged
+
+from ..models import template_validator
+
+TEMPLATE_FIELDS = [
+    {'key': 'nom', 'label': 'Nom', 'required': True},
+    {'key': 'age', 'label': 'Age', 'type': 'integer'},
+    {'key': 'poids', 'type': 'number'},
+    {'key': 'date_de_naissance', 'type': 'date'},
+    {'key': 'fumeur', 'type': 'boolean'},
+    {'key': 'code', 'pattern': r'[A-Z]{2}\d+'},
+    {'key': 'sexe', 'options': ['M', 'F']},
+    {'key': 'motif', 'max_length': '10'},
+    {'key': 'note', 'max_length': 'unlimited'},
+]
+
+
+@tagged('post_install', '-at_install')
+class TestTemplateValidator(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.validator = template_validator.get_validator(json.dumps(TEMPLATE_FIELDS))
+
+    def assertErrors(self, data, expected):
+        self.assertEqual(
+            {error['key']: error['message'] for error in self.validator.validate(data)},
+            expected,
+        )
+
+    def test_valid_data(self):
+        self.assertErrors({
+            'nom': 'Dupont',
+            'age': '42',
+            'poids': '72,5',
+            'date_de_naissance': '03/02/1982',
+            'fumeur': 'non',
+            'code': 'AB12',
+            'sexe': 'F',
+            'motif': 'Fievre',
+            'note': 'x' * 1000,
+        }, {})
+
+    def test_required(self):
+        self.assertErrors({}, {'nom': 'is required'})
+        self.assertErrors({'nom': '  '}, {'nom': 'is required'})
+
+    def test_types(self):
+        self.assertErrors({
+            'nom': 'Dupont',
+            'age': '4.2',
+            'poids': 'lourd',
+            'date_de_naissance': 'hier',
+            'fumeur': 'parfois',
+        }, {
+            'age': 'must be an integer',
+            'poids': 'must be a number',
+            'date_de_naissance': 'must be a date (YYYY-MM-DD or DD/MM/YYYY)',
+            'fumeur': 'must be yes or no',
+        })
+
+    def test_pattern_options_max_length(self):
+        self.assertErrors({
+            'nom': 'Dupont',
+            'code': 'ab12',
+            'sexe': 'X',
+            'motif': 'Douleur thoracique',
+        }, {
+            'code': 'has an invalid format',
+            'sexe': 'is not an allowed value',
+            'motif': 'must not exceed 10 characters',
+        })
+
+    def test_extra_keys_accepted(self):
+        self.assertErrors({'nom': 'Dupont', 'traitement': ['paracetamol'], 'tension': {'sys': 12}}, {})
+
+    def test_not_an_object(self):
+        self.assertErrors(['Dupont'], {None: 'Validated data must be an object'})
+
+    def test_compiled_once_per_definition(self):
+        definition = json.dumps(TEMPLATE_FIELDS)
+        self.assertIs(template_validator.get_validator(definition), self.validator)
+
+    def test_invalid_template_does_not_raise(self):
+        record = self.env['medical.transcription'].create({'template_fields_json': '{"not": "a list"}'})
+        self.assertEqual(record._check_validated_data({'nom': 'Dupont'}, ''), [])
+
+
+@tagged('post_install', '-at_install')
+class TestValidateRoute(HttpCase):
+
+    def test_field_errors(self):
+        record = self.env['medical.transcription'].create({
+            'api_transcription_id': 'abc123',
+            'template_fields_json': json.dumps(TEMPLATE_FIELDS),
+            'state': 'review',
+        })
+        self.authenticate('admin', 'admin')
+        response = self.url_open(
+            '/medical_transcription/validate',
+            data=json.dumps({'params': {
+                'transcription_id': record.id,
+                'validated_data': {'age': 'vingt'},
+                'validated_report': 'Report',
+            }}),
+            headers={'Content-Type': 'application/json'},
+        )
+        result = response.json()['result']
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['error'], 'Invalid data: Nom: is required; Age: must be an integer')
+        self.assertEqual(result['field_errors'], [
+            {'key': 'nom', 'label': 'Nom', 'message': 'is required'},
+            {'key': 'age', 'label': 'Age', 'message': 'must be an integer'},
+        ])
+        self.assertEqual(record.state, 'review')